@@ -0,0 +1,51 @@
+"""Compares the title search engines on a synthetic catalog.
+
+Run from the python directory with:
+    python3 -m benchmarks.title_search [number_of_videos]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.video_library import TITLE_SEARCH_ENGINES, VideoLibrary
+
+WORDS = ["funny", "amazing", "cat", "dog", "video", "about", "life", "at",
+         "google", "nothing", "another", "music", "live", "tutorial"]
+TERMS = ["cat", "video 1234", "google tutorial", "z", "ab", "life at goo"]
+
+
+def write_catalog(path, count):
+    """Writes a catalog of count videos with random titles."""
+    rng = random.Random(23)
+    with open(path, "w") as catalog:
+        for i in range(count):
+            title = " ".join(rng.choice(WORDS) for _ in range(4))
+            catalog.write("{0} {1} | video_{1}_id | #tag{2}\n".format(
+                title.capitalize(), i, i % 100))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = Path(tmp) / "videos.txt"
+        write_catalog(catalog, count)
+        print("{0} videos".format(count))
+        for engine in TITLE_SEARCH_ENGINES:
+            library = VideoLibrary(catalog, title_search=engine)
+            start = time.perf_counter()
+            # The first query builds lazily constructed engines.
+            library.search_titles("warm up")
+            built = time.perf_counter() - start
+            start = time.perf_counter()
+            for term in TERMS:
+                library.search_titles(term)
+            elapsed = time.perf_counter() - start
+            print("{0:>12}: first query {1:8.1f} ms, {2:8.3f} ms/query".format(
+                engine, built * 1000, elapsed * 1000 / len(TERMS)))
+
+
+if __name__ == "__main__":
+    main()
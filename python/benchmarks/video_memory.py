@@ -0,0 +1,49 @@
+"""Measures the memory used per Video.
+
+Run from the python directory with:
+    python3 -m benchmarks.video_memory [number_of_videos]
+"""
+
+import sys
+import tracemalloc
+
+from src.video import FlagTable, Video
+
+
+class DictVideo:
+    """The previous Video layout: a __dict__ and a flag list per video."""
+
+    def __init__(self, video_title, video_id, video_tags):
+        self._title = video_title
+        self._video_id = video_id
+        self._tags = tuple(video_tags)
+        self._flagged = [False, ""]
+
+
+def _bytes_per_video(make_video, count, tags):
+    titles = ["Video {0}".format(i) for i in range(count)]
+    ids = ["video_{0}_id".format(i) for i in range(count)]
+    tracemalloc.start()
+    videos = [make_video(title, url, tags)
+              for title, url in zip(titles, ids)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del videos
+    return size / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tags = ("#cat", "#animal")
+    flags = FlagTable()
+    before = _bytes_per_video(DictVideo, count, tags)
+    after = _bytes_per_video(
+        lambda title, url, tags: Video(title, url, tags, flags),
+        count, tags)
+    print("{0} videos".format(count))
+    print("before: {0:.1f} bytes per video".format(before))
+    print("after:  {0:.1f} bytes per video".format(after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""An Aho-Corasick automaton matching many terms in one pass."""
+
+from collections import deque
+
+
+class AhoCorasick:
+    """A class used to find which of many terms occur in a text.
+
+    The case-folded terms are stored in a trie whose nodes also carry a
+    failure link to the longest proper suffix present in the trie, so a
+    text is scanned once, character by character, whatever the number
+    of terms.
+    """
+
+    def __init__(self, terms) -> None:
+        """The AhoCorasick class is initialized.
+
+        Args:
+            terms: The terms to look for. A match reports the position of
+                the term in this sequence.
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [()]
+        for index, term in enumerate(terms):
+            node = 0
+            for char in term.lower():
+                following = self._goto[node].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[node][char] = following
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append(())
+                node = following
+            self._outputs[node] += (index,)
+        self._link()
+
+    def _link(self):
+        """Computes the failure links breadth first from the root."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, following in self._goto[node].items():
+                queue.append(following)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[following] = fail
+                # A node also reports the terms ending at its suffixes.
+                self._outputs[following] += self._outputs[fail]
+
+    def matches(self, text):
+        """Returns the set of indexes of the terms occurring in text.
+
+        The match ignores case. An empty term occurs in every text.
+        """
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set(outputs[0])
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+        return found
@@ -0,0 +1,100 @@
+"""Helpers to parse the pipe separated video catalog."""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import csv
+import io
+import os
+
+
+# Helper Wrapper around CSV reader to strip whitespace from around
+# each item.
+def _csv_reader_with_strip(reader):
+    yield from ((item.strip() for item in line) for line in reader)
+
+
+def read_rows(video_file):
+    """Lazily yields the stripped fields of every non-empty catalog row."""
+    reader = _csv_reader_with_strip(csv.reader(video_file, delimiter="|"))
+    for line in reader:
+        fields = list(line)
+        if fields:
+            yield fields
+
+
+def parse_rows(rows):
+    """Lazily turns raw catalog rows into (title, video_id, tags) tuples.
+
+    Raises:
+        ValueError: A row does not have exactly three fields.
+    """
+    for fields in rows:
+        if len(fields) != 3:
+            raise ValueError("Malformed catalog row: {0}".format(
+                " | ".join(fields)))
+        title, url, tags = fields
+        yield (
+            title,
+            url,
+            [tag.strip() for tag in tags.split(",")] if tags else [],
+        )
+
+
+def batched(iterable, batch_size):
+    """Yields lists of at most batch_size items from the iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def split_ranges(catalog_path, parts):
+    """Splits a catalog into at most parts byte ranges on line boundaries.
+
+    Returns:
+        A list of non-empty (start, end) byte ranges covering the file.
+    """
+    size = os.path.getsize(catalog_path)
+    boundaries = [0]
+    with open(catalog_path, "rb") as catalog_file:
+        for i in range(1, parts):
+            guess = size * i // parts
+            if guess <= boundaries[-1]:
+                continue
+            # Move the boundary past the end of the line containing the
+            # guessed byte, so no row is shared between two ranges.
+            catalog_file.seek(guess - 1)
+            catalog_file.readline()
+            boundaries.append(min(catalog_file.tell(), size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:])
+            if start < end]
+
+
+def parse_range(catalog_path, start, end):
+    """Parses the rows of one byte range of a catalog.
+
+    Returns:
+        A list of (title, video_id, tags) tuples in file order.
+    """
+    with open(catalog_path, "rb") as catalog_file:
+        catalog_file.seek(start)
+        text = catalog_file.read(end - start).decode("utf-8")
+    return list(parse_rows(read_rows(io.StringIO(text))))
+
+
+def parse_parallel(catalog_path, workers):
+    """Parses a catalog with a pool of worker processes.
+
+    Yields:
+        One list of (title, video_id, tags) tuples per byte range, in
+        file order, so callers can merge them deterministically.
+    """
+    ranges = split_ranges(catalog_path, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_range, catalog_path, start, end)
+                   for start, end in ranges]
+        for future in futures:
+            yield future.result()
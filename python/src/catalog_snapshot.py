@@ -0,0 +1,231 @@
+"""A binary catalog snapshot format."""
+
+from array import array
+from pathlib import Path
+import hashlib
+import os
+import struct
+import sys
+
+# File layout (all integers little-endian):
+#
+#   header      HEADER struct, see below
+#   offsets     (string_count + 1) x u32 byte offsets into the string blob
+#   blob        interned UTF-8 strings, each followed by a NUL separator
+#   records     record_words x u32: title, video_id, tag count, tag ids...
+#   id index    video_count x u32 record positions, sorted by video_id
+#   title index video_count x u32 record positions, sorted by title, ties
+#               in catalog order
+#
+# Every distinct string is stored once, so repeated tags cost a single
+# u32 per video. The records keep catalog order; the id index allows a
+# binary search by video_id and the title index a listing in title order
+# without decoding and sorting the whole file.
+MAGIC = b"YTVS"
+VERSION = 2
+HEADER = struct.Struct("<4sHHqq20sIII")
+_WORD = 4
+
+
+def _to_bytes(words):
+    """Returns the little-endian bytes of an array("I")."""
+    if sys.byteorder == "big":
+        words = array("I", words)
+        words.byteswap()
+    return words.tobytes()
+
+
+def _from_bytes(data):
+    """Returns the array("I") stored in little-endian bytes."""
+    words = array("I")
+    words.frombytes(data)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words
+
+
+class SnapshotException(Exception):
+    """A class to represent an unreadable or stale snapshot."""
+    pass
+
+
+def source_fingerprint(catalog_path):
+    """Returns the (mtime_ns, size) pair of a catalog file."""
+    stat = os.stat(catalog_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def source_digest(catalog_path, length=None):
+    """Returns the SHA-1 digest of a catalog file.
+
+    Args:
+        catalog_path: The catalog file.
+        length: Only hash the first length bytes when given.
+    """
+    digest = hashlib.sha1()
+    remaining = length
+    with open(catalog_path, "rb") as catalog_file:
+        while remaining is None or remaining > 0:
+            size = 1 << 20 if remaining is None else min(remaining, 1 << 20)
+            chunk = catalog_file.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.digest()
+
+
+def write_snapshot(path, videos, fingerprint, digest):
+    """Writes (title, video_id, tags) rows to a snapshot file.
+
+    Args:
+        path: Destination of the snapshot.
+        videos: Iterable of (title, video_id, tags) in catalog order.
+        fingerprint: (mtime_ns, size) of the source catalog.
+        digest: SHA-1 digest of the source catalog.
+    """
+    string_ids = {}
+    strings = []
+
+    def intern(value):
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value)
+        return sid
+
+    records = array("I")
+    positions = []
+    titles = []
+    for title, video_id, tags in videos:
+        positions.append((video_id, len(records)))
+        titles.append((title, len(titles), len(records)))
+        records.append(intern(title))
+        records.append(intern(video_id))
+        records.append(len(tags))
+        records.extend(intern(tag) for tag in tags)
+
+    offsets = array("I", [0])
+    encoded = []
+    for value in strings:
+        data = value.encode("utf-8") + b"\0"
+        encoded.append(data)
+        offsets.append(offsets[-1] + len(data))
+
+    positions.sort()
+    id_index = array("I", (position for _, position in positions))
+    titles.sort()
+    title_index = array("I", (position for _, _, position in titles))
+    header = HEADER.pack(MAGIC, VERSION, 0, fingerprint[0], fingerprint[1],
+                         digest, len(strings), len(id_index), len(records))
+
+    tmp_path = Path(str(path) + ".tmp")
+    with open(tmp_path, "wb") as snapshot_file:
+        snapshot_file.write(header)
+        snapshot_file.write(_to_bytes(offsets))
+        snapshot_file.write(b"".join(encoded))
+        snapshot_file.write(_to_bytes(records))
+        snapshot_file.write(_to_bytes(id_index))
+        snapshot_file.write(_to_bytes(title_index))
+    os.replace(tmp_path, path)
+
+
+def read_header(buffer):
+    """Validates a snapshot header and returns its fields as a dict."""
+    if len(buffer) < HEADER.size:
+        raise SnapshotException("Snapshot is truncated")
+    (magic, version, _, mtime_ns, size, digest, string_count, video_count,
+     record_words) = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise SnapshotException("Not a catalog snapshot")
+    if version != VERSION:
+        raise SnapshotException(
+            "Unsupported snapshot version {0}".format(version))
+
+    offsets_start = HEADER.size
+    blob_start = offsets_start + (string_count + 1) * _WORD
+    blob_size = struct.unpack_from(
+        "<I", buffer, offsets_start + string_count * _WORD)[0]
+    records_start = blob_start + blob_size
+    index_start = records_start + record_words * _WORD
+    title_index_start = index_start + video_count * _WORD
+    if len(buffer) != title_index_start + video_count * _WORD:
+        raise SnapshotException("Snapshot is truncated")
+
+    return {
+        "fingerprint": (mtime_ns, size),
+        "digest": digest,
+        "string_count": string_count,
+        "video_count": video_count,
+        "offsets_start": offsets_start,
+        "blob_start": blob_start,
+        "records_start": records_start,
+        "record_words": record_words,
+        "index_start": index_start,
+        "title_index_start": title_index_start,
+    }
+
+
+def check_source(header, catalog_path):
+    """Raises SnapshotException if the snapshot is stale for a catalog.
+
+    A matching mtime and size is trusted; otherwise the catalog content
+    is hashed and compared with the recorded digest.
+
+    Returns:
+        The current fingerprint of the catalog, which differs from the
+        recorded one when only the content matched, e.g. after a touch.
+    """
+    fingerprint = source_fingerprint(catalog_path)
+    if fingerprint == header["fingerprint"]:
+        return fingerprint
+    if source_digest(catalog_path) != header["digest"]:
+        raise SnapshotException(
+            "Snapshot is stale for {0}".format(catalog_path))
+    return fingerprint
+
+
+def read_snapshot(buffer):
+    """Yields the (title, video_id, tags) rows of a snapshot buffer.
+
+    Every string is decoded once and shared by the rows using it, and so
+    is every distinct tags tuple.
+    """
+    header = read_header(buffer)
+    blob = bytes(buffer[header["blob_start"]:header["records_start"]])
+    # Every string ends with a NUL, so the final split item is empty.
+    strings = [sys.intern(value)
+               for value in blob.decode("utf-8").split("\0")]
+    records = _from_bytes(
+        buffer[header["records_start"]:header["index_start"]])
+
+    tag_tuples = {}
+    position = 0
+    end = len(records)
+    while position < end:
+        tags_end = position + 3 + records[position + 2]
+        sids = records[position + 3:tags_end].tobytes()
+        tags = tag_tuples.get(sids)
+        if tags is None:
+            tags = tag_tuples[sids] = tuple(
+                strings[sid] for sid in records[position + 3:tags_end])
+        yield strings[records[position]], strings[records[position + 1]], tags
+        position = tags_end
+
+
+def read_title_order(buffer):
+    """Returns the catalog positions of a snapshot's rows in title order."""
+    header = read_header(buffer)
+    records = _from_bytes(
+        buffer[header["records_start"]:header["index_start"]])
+    ordinals = {}
+    position = 0
+    end = len(records)
+    while position < end:
+        ordinals[position] = len(ordinals)
+        position += 3 + records[position + 2]
+    title_index = _from_bytes(
+        buffer[header["title_index_start"]:
+               header["title_index_start"] + header["video_count"] * _WORD])
+    return [ordinals[position] for position in title_index]
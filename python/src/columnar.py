@@ -0,0 +1,103 @@
+"""Columnar scan kernels, vectorized with NumPy when it is installed."""
+
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; the kernels fall back to Python.
+    numpy = None
+
+# Separates the titles in the title column. It cannot occur in a catalog
+# title, so no match spans two titles.
+_SEPARATOR = "\0"
+
+
+class ColumnarTitleScan:
+    """A class used to find titles containing a term with a columnar scan.
+
+    The case-folded titles are held as one UTF-8 column with the offset
+    of every title, instead of one string per Video. With NumPy a search
+    compares the whole column against the term one byte at a time and
+    maps the hits back to titles with a vectorized binary search; without
+    it the column is scanned with str.find, jumping to the next title
+    after each hit. The column is rebuilt lazily on the first search after
+    the titles change.
+    """
+
+    def __init__(self) -> None:
+        self._videos = {}
+        self._dirty = True
+        self._rows = []
+        self._text = ""
+        self._starts = []
+
+    def __len__(self) -> int:
+        return len(self._videos)
+
+    def add(self, video) -> None:
+        """Adds the title of a video to the column."""
+        self._videos[video.row] = video
+        self._dirty = True
+
+    def remove(self, video) -> None:
+        """Removes a video added by add."""
+        del self._videos[video.row]
+        self._dirty = True
+
+    def _build(self):
+        """Lays the case-folded titles out in one column."""
+        self._rows = list(self._videos)
+        titles = [self._videos[row].title.lower() for row in self._rows]
+        self._text = _SEPARATOR.join(titles) + _SEPARATOR
+        if numpy is None:
+            starts, position = [], 0
+            for title in titles:
+                starts.append(position)
+                position += len(title) + 1
+        else:
+            encoded = self._text.encode("utf-8")
+            self._text = numpy.frombuffer(encoded, dtype=numpy.uint8)
+            lengths = numpy.fromiter(
+                (len(title.encode("utf-8")) + 1 for title in titles),
+                dtype=numpy.int64, count=len(titles))
+            starts = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))
+        self._starts = starts
+        self._dirty = False
+
+    def _positions(self, term):
+        """Returns the indexes in _rows of the titles containing term."""
+        if numpy is None:
+            text, starts = self._text, self._starts
+            found = []
+            position = text.find(term)
+            while position != -1:
+                index = bisect_right(starts, position) - 1
+                found.append(index)
+                if index + 1 == len(starts):
+                    break
+                position = text.find(term, starts[index + 1])
+            return found
+
+        needle = numpy.frombuffer(term.encode("utf-8"), dtype=numpy.uint8)
+        text = self._text
+        hits = numpy.flatnonzero(text[:len(text) - len(needle) + 1]
+                                 == needle[0])
+        for offset in range(1, len(needle)):
+            hits = hits[text[hits + offset] == needle[offset]]
+        return numpy.unique(
+            numpy.searchsorted(self._starts, hits, side="right") - 1).tolist()
+
+    def search(self, term):
+        """Returns the videos whose title contains term, ignoring case.
+
+        The videos are returned in no particular order.
+        """
+        if self._dirty:
+            self._build()
+        term = term.lower()
+        if not term:
+            return list(self._videos.values())
+        if not self._rows:
+            return []
+        return [self._videos[self._rows[index]]
+                for index in self._positions(term)]
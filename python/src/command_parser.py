@@ -97,18 +97,57 @@ class CommandParser:
             self._player.show_all_playlists()
 
         elif command[0].upper() == "SEARCH_VIDEOS":
-            if len(command) != 2:
+            if not 2 <= len(command) <= 4:
                 raise CommandException(
                     "Please enter SEARCH_VIDEOS command followed by a "
-                    "search term.")
-            self._player.search_videos(command[1])
+                    "search term, an optional page size and cursor.")
+            self._player.search_videos(command[1], *self._page_args(command))
 
         elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
-            if len(command) != 2:
+            if not 2 <= len(command) <= 4:
                 raise CommandException(
                     "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
-                    "video tag.")
-            self._player.search_videos_tag(command[1])
+                    "video tag, an optional page size and cursor.")
+            self._player.search_videos_tag(
+                command[1], *self._page_args(command))
+
+        elif command[0].upper() == "SEARCH_VIDEOS_FUZZY":
+            if not 2 <= len(command) <= 3:
+                raise CommandException(
+                    "Please enter SEARCH_VIDEOS_FUZZY command followed by a "
+                    "search term and an optional number of typos.")
+            if len(command) == 3:
+                if command[2] not in ("0", "1", "2"):
+                    raise CommandException(
+                        "Please enter a number of typos between 0 and 2.")
+                self._player.search_videos_fuzzy(command[1], int(command[2]))
+            else:
+                self._player.search_videos_fuzzy(command[1])
+
+        elif command[0].upper() == "SEARCH_REGEX":
+            if len(command) < 2:
+                raise CommandException(
+                    "Please enter SEARCH_REGEX command followed by a "
+                    "regular expression.")
+            self._player.search_videos_regex(" ".join(command[1:]))
+
+        elif command[0].upper() == "QUERY":
+            if len(command) < 2:
+                raise CommandException(
+                    "Please enter QUERY command followed by a boolean "
+                    "expression of search terms and tags.")
+            self._player.query_videos(" ".join(command[1:]))
+
+        elif command[0].upper() == "PLAY_RESULT":
+            try:
+                if len(command) != 2:
+                    raise ValueError
+                result_number = int(command[1])
+            except ValueError:
+                raise CommandException(
+                    "Please enter PLAY_RESULT command followed by the "
+                    "number of a search result.")
+            self._player.play_result(result_number)
 
         elif command[0].upper() == "FLAG_VIDEO":
             if len(command) == 3:
@@ -127,6 +166,9 @@ class CommandParser:
                     "video_id.")
             self._player.allow_video(command[1])
 
+        elif command[0].upper() == "RELOAD_LIBRARY":
+            self._player.reload_library()
+
         elif command[0].upper() == "HELP":
             self._get_help()
         else:
@@ -134,6 +176,19 @@ class CommandParser:
                 "Please enter a valid command, type HELP for a list of "
                 "available commands.")
 
+    def _page_args(self, command):
+        """Returns the (limit, cursor) of a paginated search command."""
+        if len(command) < 3:
+            return None, None
+        try:
+            limit = int(command[2])
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise CommandException(
+                "Please enter a positive number of results per page.")
+        return limit, command[3] if len(command) == 4 else None
+
     def _get_help(self):
         """Displays all available commands to the user."""
         help_text = textwrap.dedent("""
@@ -153,10 +208,15 @@ class CommandParser:
             DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
             SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
             SHOW_ALL_PLAYLISTS - Display all the available playlists.
-            SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
-            SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
+            SEARCH_VIDEOS <search_term> [page_size] [cursor] - Display all the videos whose titles contain the search_term, optionally one page at a time.
+            SEARCH_VIDEOS_WITH_TAG <tag_name> [page_size] [cursor] -Display all videos whose tags contains the provided tag, optionally one page at a time.
+            SEARCH_VIDEOS_FUZZY <search_term> [typos] - Display all the videos whose titles contain words within the given number of typos (1 by default) of the search_term.
+            SEARCH_REGEX <pattern> - Display all the videos whose titles match the regular expression.
+            QUERY <expression> - Display the videos matching search terms and #tags combined with AND, OR, NOT and parentheses.
+            PLAY_RESULT <number> - Plays the video listed with that number by the last search.
             FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
             ALLOW_VIDEO <video_id> - Removes a flag from a video.
+            RELOAD_LIBRARY - Picks up changes made to the video catalog.
             HELP - Displays help.
             EXIT - Terminates the program execution.
         """)
@@ -0,0 +1,115 @@
+"""A typo-tolerant index over the words of video titles."""
+
+import re
+
+# Largest number of edits a FuzzyIndex can tolerate. Every indexed word
+# is stored with all its variants missing up to this many characters.
+MAX_EDITS = 2
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    """Returns the case-folded words of a text."""
+    return _WORD.findall(text.lower())
+
+
+def deletes(word, max_edits):
+    """Returns word and every variant of it missing up to max_edits chars."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_edits):
+        frontier = {variant[:i] + variant[i + 1:]
+                    for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a, b, max_edits):
+    """Returns the Levenshtein distance of a and b, capped at max_edits + 1.
+
+    Rows of the dynamic programming table are abandoned as soon as all of
+    their cells exceed max_edits.
+    """
+    if abs(len(a) - len(b)) > max_edits:
+        return max_edits + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_edits:
+            return max_edits + 1
+        previous = current
+    return min(previous[-1], max_edits + 1)
+
+
+class FuzzyIndex:
+    """A class used to find the keys whose text has words close to a term.
+
+    It is a symmetric delete index: the variants of every indexed word
+    with up to MAX_EDITS characters removed map back to the word. Two
+    words within k edits share a variant with at most k deletions each,
+    so a lookup only generates the deletions of the searched word and
+    verifies the few words they lead to, whatever the catalog size.
+    """
+
+    def __init__(self) -> None:
+        self._postings = {}
+        self._deletes = {}
+
+    def __len__(self) -> int:
+        """Returns the number of distinct indexed words."""
+        return len(self._postings)
+
+    def add(self, key, text) -> None:
+        """Indexes the words of text under key."""
+        for word in set(words(text)):
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = set()
+                for variant in deletes(word, MAX_EDITS):
+                    self._deletes.setdefault(variant, set()).add(word)
+            posting.add(key)
+
+    def remove(self, key, text) -> None:
+        """Removes a text indexed by add."""
+        for word in set(words(text)):
+            posting = self._postings[word]
+            posting.discard(key)
+            if not posting:
+                del self._postings[word]
+                for variant in deletes(word, MAX_EDITS):
+                    similar = self._deletes[variant]
+                    similar.discard(word)
+                    if not similar:
+                        del self._deletes[variant]
+
+    def similar_words(self, word, max_edits):
+        """Returns the indexed words within max_edits edits of word."""
+        candidates = set()
+        for variant in deletes(word, max_edits):
+            candidates |= self._deletes.get(variant, set())
+        return {candidate for candidate in candidates
+                if edit_distance(word, candidate, max_edits) <= max_edits}
+
+    def search(self, term, max_edits):
+        """Returns the keys having a close word for every word of term.
+
+        Args:
+            term: The searched words.
+            max_edits: The edits tolerated per word, at most MAX_EDITS.
+        """
+        if not 0 <= max_edits <= MAX_EDITS:
+            raise ValueError(
+                "max_edits must be between 0 and {0}".format(MAX_EDITS))
+        keys = None
+        for word in set(words(term)):
+            matches = set()
+            for similar in self.similar_words(word, max_edits):
+                matches |= self._postings[similar]
+            keys = matches if keys is None else keys & matches
+            if not keys:
+                return set()
+        return keys or set()
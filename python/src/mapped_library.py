@@ -0,0 +1,180 @@
+"""A memory-mapped video library class."""
+
+from . import catalog_snapshot
+from .catalog_snapshot import SnapshotException
+from .video import Video
+from .video_library import CatalogDelta
+from .video_library import CatalogView
+from .video_library import VideoLibrary
+import mmap
+import struct
+
+_U32 = struct.Struct("<I")
+_RECORD_HEAD = struct.Struct("<III")
+
+
+class MappedVideoLibrary(VideoLibrary):
+    """A Video Library that reads videos straight from a mapped snapshot.
+
+    Only the snapshot's sorted id index is consulted on lookups; a Video
+    is decoded from the mapped file each time it is requested. The
+    mapping is read-only, so processes opening the same snapshot share
+    its pages through the OS page cache.
+    """
+
+    def __init__(self, snapshot_path, catalog_path=None):
+        """The MappedVideoLibrary class is initialized.
+
+        Args:
+            snapshot_path: A snapshot written by VideoLibrary.save_snapshot.
+            catalog_path: The catalog the snapshot must be current for.
+                Defaults to the bundled videos.txt.
+
+        Raises:
+            SnapshotException: The snapshot is corrupt, of another version
+                or older than the catalog.
+        """
+        self._reset(catalog_path)
+        # Flag state cannot live in the read-only mapping; the few flagged
+        # videos are tracked here and applied when a Video is decoded.
+        self._flags = {}
+        with open(snapshot_path, "rb") as snapshot_file:
+            self._buffer = mmap.mmap(
+                snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._header = catalog_snapshot.read_header(self._buffer)
+        self._source_fingerprint = catalog_snapshot.check_source(
+            self._header, self._catalog_path)
+
+    def close(self):
+        """Releases the mapping."""
+        self._buffer.close()
+
+    def _string_bytes(self, sid):
+        """Returns a view of the UTF-8 bytes of string number sid."""
+        position = self._header["offsets_start"] + sid * _U32.size
+        start, end = struct.unpack_from("<II", self._buffer, position)
+        blob_start = self._header["blob_start"]
+        # The stored length includes the NUL separator.
+        return memoryview(self._buffer)[blob_start + start:
+                                        blob_start + end - 1]
+
+    def _string(self, sid):
+        """Decodes string number sid from the string blob."""
+        return str(self._string_bytes(sid), "utf-8")
+
+    def _record_offset(self, word):
+        """Returns the byte offset of the record at u32 position word."""
+        return self._header["records_start"] + word * _U32.size
+
+    def _decode(self, offset):
+        """Materializes the Video stored at a record byte offset."""
+        title_sid, id_sid, tag_count = _RECORD_HEAD.unpack_from(
+            self._buffer, offset)
+        tag_sids = struct.unpack_from(
+            "<{0}I".format(tag_count), self._buffer,
+            offset + _RECORD_HEAD.size)
+        video_id = self._string(id_sid)
+        video = Video(
+            self._string(title_sid),
+            video_id,
+            [self._string(sid) for sid in tag_sids],
+        )
+        flagged = self._flags.get(video_id)
+        if flagged is not None:
+            video.flagged = flagged
+        return video
+
+    def _find_record(self, video_id):
+        """Binary searches the id index, returns a record offset or None."""
+        key = video_id.encode("utf-8")
+        index_start = self._header["index_start"]
+        low, high = 0, self._header["video_count"]
+        while low < high:
+            mid = (low + high) // 2
+            word = _U32.unpack_from(
+                self._buffer, index_start + mid * _U32.size)[0]
+            offset = self._record_offset(word)
+            id_sid = _U32.unpack_from(self._buffer, offset + _U32.size)[0]
+            candidate = self._string_bytes(id_sid)
+            if candidate == key:
+                return offset
+            if bytes(candidate) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return None
+
+    def iter_videos(self):
+        """Decodes the videos one at a time in catalog order."""
+        offset = self._record_offset(0)
+        end = self._header["index_start"]
+        while offset < end:
+            yield self._decode(offset)
+            tag_count = _U32.unpack_from(
+                self._buffer, offset + 2 * _U32.size)[0]
+            offset += _RECORD_HEAD.size + tag_count * _U32.size
+
+    def iter_videos_by_title(self):
+        """Iterates over the videos in title order, ties in catalog order.
+
+        The videos are decoded one at a time following the snapshot's
+        title index.
+        """
+        index_start = self._header["title_index_start"]
+        for number in range(self._header["video_count"]):
+            word = _U32.unpack_from(
+                self._buffer, index_start + number * _U32.size)[0]
+            yield self._decode(self._record_offset(word))
+
+    def view_all_videos(self):
+        """Returns a read-only live view of the videos in catalog order."""
+        return CatalogView(self)
+
+    def count(self):
+        """Returns the number of videos in the snapshot."""
+        return self._header["video_count"]
+
+    def count_flagged(self):
+        """Returns the number of flagged videos in the library."""
+        return len(self._flags)
+
+    def get_video(self, video_id):
+        """Returns the video object (title, url, tags) from the video library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            A freshly decoded Video for the requested video_id. None if the
+            video does not exist.
+        """
+        offset = self._find_record(video_id)
+        if offset is None:
+            return None
+        return self._decode(offset)
+
+    def reload(self):
+        """Checks that the catalog still matches the mapped snapshot.
+
+        Snapshots are immutable, so there is nothing to apply.
+
+        Returns:
+            An empty CatalogDelta.
+
+        Raises:
+            SnapshotException: The catalog changed; a new snapshot must be
+                saved and mapped.
+        """
+        fingerprint = catalog_snapshot.source_fingerprint(self._catalog_path)
+        if fingerprint != self._source_fingerprint:
+            raise SnapshotException(
+                "Catalog {0} changed since the snapshot was saved".format(
+                    self._catalog_path))
+        return CatalogDelta([], [], [])
+
+    def set_flag(self, video_id, flagged):
+        """Stores the [is_flagged, reason] state of a video."""
+        if flagged[0]:
+            self._flags[video_id] = flagged
+        else:
+            self._flags.pop(video_id, None)
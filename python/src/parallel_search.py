@@ -0,0 +1,110 @@
+"""Title and tag searches spread over a pool of worker processes."""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+# The partitions of the catalog held by a worker process, installed once
+# when the worker starts.
+_partitions = []
+
+
+def _install(partitions):
+    """Pool initializer keeping the catalog partitions in the worker."""
+    global _partitions
+    _partitions = partitions
+
+
+def _scan(index, field, term):
+    """Returns the video_ids of a partition matching term, in order.
+
+    Args:
+        index: The partition to scan.
+        field: 0 to match the titles, 1 to match the tags.
+        term: The case-folded term.
+    """
+    if field == 0:
+        return [video_id for title, _, video_id in _partitions[index]
+                if title.find(term) != -1]
+    return [video_id for _, tags, video_id in _partitions[index]
+            if any(tag.find(term) != -1 for tag in tags)]
+
+
+class ParallelSearcher:
+    """A class used to search a Video Library with several processes.
+
+    The title ordered catalog is cut into one contiguous partition per
+    worker. Workers are forked once with the partitions already in their
+    memory, where the platform allows it, so a query only sends the term
+    and receives video_ids. As each partition holds a range of the title
+    order, merging the partial answers is a concatenation. The partitions
+    are rebuilt when the library has been reloaded since they were cut.
+    """
+
+    def __init__(self, video_library, workers=None):
+        """The ParallelSearcher class is initialized.
+
+        Args:
+            video_library: The library to search.
+            workers: Number of worker processes, the number of CPUs by
+                default.
+        """
+        self._library = video_library
+        self._workers = workers or multiprocessing.cpu_count()
+        self._executor = None
+        self._fingerprint = None
+        self._count = 0
+
+    def close(self):
+        """Stops the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _start(self):
+        """Cuts the catalog into partitions and starts the workers."""
+        self.close()
+        entries = [(video.title.lower(),
+                    tuple(tag.lower() for tag in video.tags),
+                    video.video_id)
+                   for video in self._library.iter_videos_by_title()]
+        size = -(-len(entries) // self._workers) or 1
+        partitions = [entries[start:start + size]
+                      for start in range(0, len(entries), size)]
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = None
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._workers, mp_context=context,
+            initializer=_install, initargs=(partitions,))
+        self._count = len(partitions)
+        self._fingerprint = self._library.source_fingerprint
+
+    def _search(self, field, term):
+        """Scans every partition in parallel and merges the answers."""
+        if (self._executor is None
+                or self._fingerprint != self._library.source_fingerprint):
+            self._start()
+        futures = [self._executor.submit(_scan, index, field, term.lower())
+                   for index in range(self._count)]
+        videos = []
+        for future in futures:
+            for video_id in future.result():
+                videos.append(self._library.get_video(video_id))
+        return videos
+
+    def search_titles(self, search_term):
+        """Returns the videos whose title contains search_term.
+
+        Like VideoLibrary.search_titles the match is case insensitive, the
+        videos are ordered by title and flagged videos are included.
+        """
+        return self._search(0, search_term)
+
+    def search_tags(self, video_tag):
+        """Returns the videos with a tag containing video_tag.
+
+        Like VideoLibrary.search_tags the match is case insensitive, the
+        videos are ordered by title and flagged videos are included.
+        """
+        return self._search(1, video_tag)
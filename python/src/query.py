@@ -0,0 +1,185 @@
+"""A boolean query language over video titles and tags."""
+
+import re
+
+# Keywords are matched case-insensitively; any other word is a title term,
+# or a tag when it starts with '#'.
+_TOKEN = re.compile(r"\s*(\(|\)|[^\s()]+)")
+_KEYWORDS = ("AND", "OR", "NOT")
+
+
+class QueryException(Exception):
+    """A class to represent a query that cannot be parsed."""
+    pass
+
+
+def tokenize(expression):
+    """Splits a query into words and parentheses."""
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """A recursive descent parser producing a query tree.
+
+    The tree is made of tuples: ("title", term), ("tag", tag),
+    ("and", [children]), ("or", [children]) and ("not", child).
+
+        or_expr  := and_expr ("OR" and_expr)*
+        and_expr := unary (["AND"] unary | "NOT" unary)*
+        unary    := "NOT" unary | "(" or_expr ")" | word
+    """
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._position = 0
+
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _keyword(self):
+        token = self._peek()
+        if token is not None and token.upper() in _KEYWORDS:
+            return token.upper()
+        return None
+
+    def _next(self):
+        token = self._peek()
+        self._position += 1
+        return token
+
+    def parse(self):
+        if not self._tokens:
+            raise QueryException("The query is empty")
+        node = self._or_expr()
+        if self._peek() is not None:
+            raise QueryException(
+                "Unexpected '{0}' in query".format(self._peek()))
+        return node
+
+    def _or_expr(self):
+        children = [self._and_expr()]
+        while self._keyword() == "OR":
+            self._next()
+            children.append(self._and_expr())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def _and_expr(self):
+        children = [self._unary()]
+        while self._peek() not in (None, ")") and self._keyword() != "OR":
+            keyword = self._keyword()
+            if keyword == "AND":
+                self._next()
+                children.append(self._unary())
+            elif keyword == "NOT":
+                self._next()
+                children.append(("not", self._unary()))
+            else:
+                # Adjacent terms are implicitly joined by AND.
+                children.append(self._unary())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def _unary(self):
+        token = self._next()
+        if token is None:
+            raise QueryException("The query ends unexpectedly")
+        if token.upper() == "NOT":
+            return ("not", self._unary())
+        if token == "(":
+            node = self._or_expr()
+            if self._next() != ")":
+                raise QueryException("Missing ')' in query")
+            return node
+        if token == ")" or token.upper() in _KEYWORDS:
+            raise QueryException("Unexpected '{0}' in query".format(token))
+        if token.startswith("#"):
+            return ("tag", token)
+        return ("title", token)
+
+
+def parse(expression):
+    """Parses a query into a tree of tuples.
+
+    Raises:
+        QueryException: The query is not well formed.
+    """
+    return _Parser(tokenize(expression)).parse()
+
+
+class QueryPlanner:
+    """A class used to evaluate query trees over posting sets.
+
+    Leaves are resolved through the given lookups into sets of
+    video_ids. Conjunctions intersect their operands smallest first and
+    stop at the first empty one; negated operands are subtracted last.
+    Only a query that is purely negative touches the whole catalog.
+    """
+
+    def __init__(self, title_ids, tag_ids, all_ids):
+        """The QueryPlanner class is initialized.
+
+        Args:
+            title_ids: Callable returning the ids whose title contains a
+                term.
+            tag_ids: Callable returning the ids with a tag containing a
+                term.
+            all_ids: Callable returning the ids of every video.
+        """
+        self._title_ids = title_ids
+        self._tag_ids = tag_ids
+        self._all_ids = all_ids
+
+    def evaluate(self, node):
+        """Returns the set of video_ids matching a query tree."""
+        kind = node[0]
+        if kind == "title":
+            return set(self._title_ids(node[1]))
+        if kind == "tag":
+            return set(self._tag_ids(node[1]))
+        if kind == "not":
+            return self._all_ids() - self.evaluate(node[1])
+        if kind == "or":
+            result = set()
+            for child in node[1]:
+                result |= self.evaluate(child)
+            return result
+        return self._conjunction(node[1])
+
+    def _conjunction(self, children):
+        """Intersects the positive operands, then removes the negated."""
+        positives = [child for child in children if child[0] != "not"]
+        negatives = [child[1] for child in children if child[0] == "not"]
+
+        # Leaves are cheap index lookups, so they are resolved first and
+        # may make the costlier sub-queries unnecessary.
+        positives.sort(key=lambda child: child[0] not in ("title", "tag"))
+        sets = []
+        for child in positives:
+            ids = self.evaluate(child)
+            if not ids:
+                return set()
+            sets.append(ids)
+
+        if sets:
+            sets.sort(key=len)
+            result = set(sets[0])
+            for ids in sets[1:]:
+                result &= ids
+                if not result:
+                    return result
+        else:
+            result = self._all_ids()
+
+        for child in negatives:
+            if not result:
+                break
+            result -= self.evaluate(child)
+        return result
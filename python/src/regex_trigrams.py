@@ -0,0 +1,204 @@
+"""Substrings a regular expression requires, used to prefilter titles.
+
+A regex is reduced to a query of literal substrings every match must
+contain: ("lit", text), ("and", [queries]) or ("or", [queries]), None
+meaning no requirement. Looking those substrings up in a TrigramIndex
+leaves a small set of candidates for the full regex to check. The
+analysis follows the "exact set" approach of Google Code Search: runs of
+characters are kept as the small set of strings they can spell, and
+turned into requirements where the run ends.
+"""
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+    from re._casefix import _EXTRA_CASES
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+    from sre_compile import _ignorecase_fixes as _EXTRA_CASES
+
+# Largest number of strings an exact set may hold before it is dropped.
+MAX_EXACT = 16
+
+# Widest character range of a class expanded into an exact set.
+_MAX_RANGE = 16
+
+# An expression that can match anything: no exact set, no requirement.
+_UNKNOWN = (None, None)
+_EMPTY = ({""}, None)
+
+
+def _literals(strings):
+    """Returns the query requiring one of strings, None if one is empty."""
+    if "" in strings:
+        return None
+    queries = [("lit", string) for string in sorted(strings)]
+    return queries[0] if len(queries) == 1 else ("or", queries)
+
+
+def _all(queries):
+    """Returns the query requiring every one of queries."""
+    queries = [query for query in queries if query is not None]
+    if not queries:
+        return None
+    return queries[0] if len(queries) == 1 else ("and", queries)
+
+
+def _any(queries):
+    """Returns the query requiring one of queries."""
+    if any(query is None for query in queries):
+        return None
+    return queries[0] if len(queries) == 1 else ("or", queries)
+
+
+def _query(info):
+    """Turns an (exact, query) pair into a query."""
+    exact, query = info
+    return query if exact is None else _literals(exact)
+
+
+def _folded(code, flags):
+    """Returns the case-folded characters code matches, None if unknown.
+
+    Under IGNORECASE a few characters also match others that case-fold
+    apart, like "s" and "\u017f", so all of them are kept. A sigma may
+    also be final: str.lower() folds a capital sigma ending a word in an
+    indexed title to "\u03c2".
+    """
+    char = chr(code).lower()
+    if (not flags & sre_constants.SRE_FLAG_IGNORECASE
+            or flags & sre_constants.SRE_FLAG_ASCII):
+        chars = {char}
+    elif len(char) != 1:
+        return None
+    else:
+        chars = {char}.union(chr(extra).lower()
+                             for extra in _EXTRA_CASES.get(ord(char), ()))
+    if "\u03c3" in chars:
+        chars.add("\u03c2")
+    return chars
+
+
+def _sequence(items, flags):
+    """Analyzes a concatenation of parsed regex items."""
+    run = {""}
+    required = []
+    concatenated = True
+    for op, argument in items:
+        exact, query = _item(op, argument, flags)
+        if exact is not None and len(run) * len(exact) <= MAX_EXACT:
+            run = {left + right for left in run for right in exact}
+            continue
+        concatenated = False
+        required.append(_literals(run))
+        if exact is not None and len(exact) <= MAX_EXACT:
+            run = set(exact)
+        else:
+            run = {""}
+            required.append(query)
+    if concatenated:
+        return run, None
+    required.append(_literals(run))
+    return None, _all(required)
+
+
+def _item(op, argument, flags):
+    """Analyzes one parsed regex item into an (exact, query) pair."""
+    if op is sre_constants.LITERAL:
+        chars = _folded(argument, flags)
+        return _UNKNOWN if chars is None else (chars, None)
+    if op in (sre_constants.AT, sre_constants.ASSERT,
+              sre_constants.ASSERT_NOT):
+        # They match without consuming any character.
+        return _EMPTY
+    if op is sre_constants.IN:
+        return _char_class(argument, flags)
+    if op is sre_constants.SUBPATTERN:
+        # A scoped group like (?i:...) carries the flags it adds and drops.
+        _, add_flags, del_flags, items = argument
+        return _sequence(items, (flags | add_flags) & ~del_flags)
+    if op is getattr(sre_constants, "ATOMIC_GROUP", None):
+        return _sequence(argument, flags)
+    if op is sre_constants.BRANCH:
+        infos = [_sequence(branch, flags) for branch in argument[1]]
+        if all(exact is not None for exact, _ in infos):
+            exact = set().union(*(exact for exact, _ in infos))
+            if len(exact) <= MAX_EXACT:
+                return exact, None
+        return None, _any([_query(info) for info in infos])
+    if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+              getattr(sre_constants, "POSSESSIVE_REPEAT", None)):
+        minimum, maximum, items = argument
+        if minimum == 0:
+            return _UNKNOWN
+        info = _sequence(items, flags)
+        if minimum == maximum == 1:
+            return info
+        return None, _query(info)
+    return _UNKNOWN
+
+
+def _char_class(items, flags):
+    """Returns the exact set of a character class, if it is small."""
+    codes = []
+    for op, argument in items:
+        if op is sre_constants.LITERAL:
+            codes.append(argument)
+        elif (op is sre_constants.RANGE
+              and argument[1] - argument[0] < _MAX_RANGE):
+            codes.extend(range(argument[0], argument[1] + 1))
+        else:
+            return _UNKNOWN
+    chars = set()
+    for code in codes:
+        folded = _folded(code, flags)
+        if folded is None:
+            return _UNKNOWN
+        chars |= folded
+    if len(chars) > MAX_EXACT:
+        return _UNKNOWN
+    return chars, None
+
+
+def required_query(pattern, flags=0):
+    """Returns the query of substrings every match of pattern contains.
+
+    The substrings are case-folded, so they must be looked up among
+    case-folded texts. Matching them is necessary, not sufficient.
+
+    Raises:
+        re.error: The pattern is not a valid regular expression.
+    """
+    parsed = sre_parse.parse(pattern, flags)
+    return _query(_sequence(parsed, parsed.state.flags))
+
+
+def candidates(query, lookup):
+    """Evaluates a query of substrings.
+
+    Args:
+        query: A query returned by required_query.
+        lookup: Callable returning the keys whose text may contain a
+            substring, or None when every key may.
+
+    Returns:
+        The set of candidate keys, or None when every key is one.
+    """
+    if query is None:
+        return None
+    if query[0] == "lit":
+        return lookup(query[1])
+    keys = [candidates(child, lookup) for child in query[1]]
+    if query[0] == "or":
+        if any(child is None for child in keys):
+            return None
+        return set().union(*keys)
+    keys = [child for child in keys if child is not None]
+    if not keys:
+        return None
+    keys.sort(key=len)
+    result = set(keys[0])
+    for child in keys[1:]:
+        result &= child
+    return result
@@ -0,0 +1,69 @@
+"""A result cache for read-only player commands."""
+
+from collections import OrderedDict
+
+
+class ResultCache:
+    """A class used to represent an LRU cache of command results.
+
+    Every entry remembers the versions of the state it was computed from.
+    An entry read back with different versions is stale: it is dropped
+    and counted as a miss. The cache is bounded both by its number of
+    entries and by the total size of the cached values.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=1 << 20) -> None:
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, versions):
+        """Returns the value cached for key at versions, None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == versions:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        if entry is not None:
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def put(self, key, versions, value, size) -> None:
+        """Caches the value of key computed at versions.
+
+        Args:
+            key: The command and its arguments.
+            versions: The state versions the value was computed from.
+            value: The result to cache.
+            size: The approximate size of value in bytes.
+        """
+        if key in self._entries:
+            self._drop(key)
+        if size > self._max_bytes or self._max_entries < 1:
+            return
+        self._entries[key] = (versions, value, size)
+        self._bytes += size
+        while (len(self._entries) > self._max_entries
+               or self._bytes > self._max_bytes):
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key) -> None:
+        """Removes the entry of key."""
+        self._bytes -= self._entries.pop(key)[2]
+
+    def stats(self):
+        """Returns the hit, miss, entry and byte counts of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
@@ -1,4 +1,6 @@
 """A youtube terminal simulator."""
+import sys
+
 from .video_player import VideoPlayer
 from .command_parser import CommandException
 from .command_parser import CommandParser
@@ -7,15 +9,19 @@ from .command_parser import CommandParser
 if __name__ == "__main__":
     print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
+    # With --no-prompt searches do not ask for a video, use PLAY_RESULT.
+    video_player = VideoPlayer(prompt="--no-prompt" not in sys.argv[1:])
     parser = CommandParser(video_player)
-    while True:
-        command = input("YT> ")
-        if command.upper() == "EXIT":
-            break
-        try:
-            parser.execute_command(command.split())
-        except CommandException as e:
-            print(e)
+    try:
+        while True:
+            command = input("YT> ")
+            if command.upper() == "EXIT":
+                break
+            try:
+                parser.execute_command(command.split())
+            except CommandException as e:
+                print(e)
+    finally:
+        video_player.close()
     print("YouTube has now terminated its execution. "
           "Thank you and goodbye!")
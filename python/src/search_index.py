@@ -0,0 +1,209 @@
+"""Inverted indexes used to search the video library."""
+
+# Titles are padded so that every one and two character substring is the
+# prefix of at least one indexed trigram.
+_PAD = "\0\0"
+
+
+def trigrams(text):
+    """Returns the set of trigrams of a case-folded, padded text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """A class used to find the keys whose text may contain a term.
+
+    Every trigram of an indexed, case-folded text maps to the keys of the
+    texts containing it. A term of three or more characters intersects
+    the posting lists of its trigrams, smallest first. Texts are padded,
+    so shorter terms are answered from the trigrams they are a prefix of.
+    """
+
+    def __init__(self) -> None:
+        self._postings = {}
+        self._prefixes = {}
+
+    def add(self, key, text) -> None:
+        """Indexes a case-folded text under key."""
+        for gram in trigrams(text + _PAD):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = set()
+                for prefix in (gram[:1], gram[:2]):
+                    self._prefixes.setdefault(prefix, set()).add(gram)
+            posting.add(key)
+
+    def remove(self, key, text) -> None:
+        """Removes a text indexed by add."""
+        for gram in trigrams(text + _PAD):
+            posting = self._postings[gram]
+            posting.discard(key)
+            if not posting:
+                del self._postings[gram]
+                for prefix in (gram[:1], gram[:2]):
+                    grams = self._prefixes[prefix]
+                    grams.discard(gram)
+                    if not grams:
+                        del self._prefixes[prefix]
+
+    def candidates(self, term):
+        """Returns the keys whose text may contain the case-folded term.
+
+        Returns:
+            A set of keys, or None when every key is a candidate.
+        """
+        if not term:
+            return None
+
+        if len(term) < 3:
+            keys = set()
+            for gram in self._prefixes.get(term, ()):
+                keys |= self._postings[gram]
+            return keys
+
+        postings = []
+        for gram in trigrams(term):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        keys = set(postings[0])
+        for posting in postings[1:]:
+            keys &= posting
+            if not keys:
+                break
+        return keys
+
+
+class TitleTrigramIndex:
+    """A class used to find the videos whose title contains a term.
+
+    Candidates come from a TrigramIndex over the case-folded titles and
+    only those are checked against the term.
+    """
+
+    def __init__(self) -> None:
+        self._grams = TrigramIndex()
+        self._videos = {}
+
+    def __len__(self) -> int:
+        return len(self._videos)
+
+    def add(self, video) -> None:
+        """Indexes the title of a video."""
+        self._videos[video.row] = video
+        self._grams.add(video.row, video.title.lower())
+
+    def remove(self, video) -> None:
+        """Removes a video indexed by add."""
+        del self._videos[video.row]
+        self._grams.remove(video.row, video.title.lower())
+
+    def candidates(self, term):
+        """Returns the rows whose title may contain the case-folded term.
+
+        Returns:
+            A set of rows, or None when every row is a candidate.
+        """
+        return self._grams.candidates(term)
+
+    def video(self, row):
+        """Returns the video indexed under row."""
+        return self._videos[row]
+
+    def search(self, term):
+        """Returns the videos whose title contains term, ignoring case.
+
+        The videos are returned in no particular order.
+        """
+        term = term.lower()
+        rows = self._grams.candidates(term)
+        if rows is None:
+            return list(self._videos.values())
+        videos = (self._videos[row] for row in rows)
+        return [video for video in videos
+                if video.title.lower().find(term) != -1]
+
+
+class TitleScan:
+    """A class used to find titles containing a term by scanning them all.
+
+    It has the interface of TitleTrigramIndex without its memory cost.
+    """
+
+    def __init__(self) -> None:
+        self._videos = {}
+
+    def __len__(self) -> int:
+        return len(self._videos)
+
+    def add(self, video) -> None:
+        """Adds a video to the scanned set."""
+        self._videos[video.row] = video
+
+    def remove(self, video) -> None:
+        """Removes a video added by add."""
+        del self._videos[video.row]
+
+    def search(self, term):
+        """Returns the videos whose title contains term, ignoring case.
+
+        The videos are returned in no particular order.
+        """
+        term = term.lower()
+        return [video for video in self._videos.values()
+                if video.title.lower().find(term) != -1]
+
+
+class TagIndex:
+    """A class used to find the videos with a tag containing a term.
+
+    Each tag of the vocabulary maps to the rows of the videos carrying
+    it. A query first resolves the matching tags in the vocabulary and
+    then unions their posting sets, so every video is returned once.
+    """
+
+    def __init__(self, vocabulary) -> None:
+        self._vocabulary = vocabulary
+        self._postings = {}
+        self._videos = {}
+
+    def __len__(self) -> int:
+        return len(self._videos)
+
+    def _codes(self, video):
+        return set(self._vocabulary.encode(video.tags).codes)
+
+    def add(self, video) -> None:
+        """Indexes the tags of a video."""
+        self._videos[video.row] = video
+        for code in self._codes(video):
+            self._postings.setdefault(code, set()).add(video.row)
+
+    def remove(self, video) -> None:
+        """Removes a video indexed by add."""
+        del self._videos[video.row]
+        for code in self._codes(video):
+            posting = self._postings[code]
+            posting.discard(video.row)
+            if not posting:
+                del self._postings[code]
+
+    def rows(self, term):
+        """Returns the set of rows of the videos with a tag containing term."""
+        rows = set()
+        for code in self._vocabulary.matching(term):
+            rows |= self._postings.get(code, set())
+        return rows
+
+    def video(self, row):
+        """Returns the video indexed under row."""
+        return self._videos[row]
+
+    def search(self, term):
+        """Returns the videos with a tag containing term, ignoring case.
+
+        The videos are returned in no particular order.
+        """
+        return [self._videos[row] for row in self.rows(term)]
@@ -0,0 +1,320 @@
+"""A video library sharded across worker processes."""
+
+from . import catalog_snapshot
+from .catalog_parser import batched, parse_range, parse_rows, read_rows
+from .video import Video
+from .video_library import CatalogDelta
+from .video_library import CatalogView
+from .video_library import DEFAULT_BATCH_SIZE
+from .video_library import DUPLICATE_POLICIES
+from .video_library import VideoLibrary
+import heapq
+import multiprocessing
+import zlib
+
+
+def shard_of(video_id, shards):
+    """Returns the shard owning a video_id, stable across processes."""
+    return zlib.crc32(video_id.encode("utf-8")) % shards
+
+
+def _pack(video):
+    """Turns a Video into a picklable (title, video_id, tags, flagged)."""
+    return video.title, video.video_id, video.tags, video.flagged
+
+
+def _unpack(fields):
+    """Turns a _pack tuple back into a Video."""
+    title, url, tags, flagged = fields
+    video = Video(title, url, tags)
+    if flagged[0]:
+        video.flagged = flagged
+    return video
+
+
+def _serve(connection, on_duplicate):
+    """Runs one shard: a plain VideoLibrary answering coordinator requests.
+
+    Every row carries its position in the catalog, so the coordinator can
+    merge the answers of all shards back into catalog or title order.
+    """
+    library = VideoLibrary.__new__(VideoLibrary)
+    library._reset(None)
+    library._on_duplicate = on_duplicate
+    positions = {}
+    pending = []
+
+    def ordered(videos, key):
+        return [(key(video), _pack(video)) for video in videos]
+
+    def by_position(video):
+        return positions[video.video_id]
+
+    def by_title(video):
+        return video.title, positions[video.video_id]
+
+    while True:
+        request = connection.recv()
+        operation = request[0]
+        if operation == "rows":
+            # Streamed without a reply until "apply" arrives.
+            pending.extend(request[1])
+            continue
+        if operation == "discard":
+            # The coordinator gave up on the rows streamed so far.
+            pending = []
+            continue
+        if operation == "stop":
+            break
+
+        try:
+            if operation == "check":
+                # Runs the duplicate policy alone, so that no shard
+                # applies rows another shard is going to reject.
+                seen = set(library._videos) if request[1] else set()
+                for _, _, url, _ in pending:
+                    library._keep_row(url, seen)
+                    seen.add(url)
+                result = None
+            elif operation == "apply":
+                appended = request[1]
+                first_positions = {}
+                for position, _, url, _ in pending:
+                    first_positions.setdefault(url, position)
+                delta = library._apply_rows(
+                    ((title, url, tags) for _, title, url, tags in pending),
+                    appended)
+                if not appended:
+                    positions = {}
+                for url in library._videos:
+                    if url not in positions:
+                        positions[url] = first_positions[url]
+                for url in delta.removed:
+                    positions.pop(url, None)
+                pending = []
+                result = delta
+            elif operation == "count":
+                result = library.count()
+            elif operation == "count_flagged":
+                result = library.count_flagged()
+            elif operation == "get":
+                video = library.get_video(request[1])
+                result = None if video is None else _pack(video)
+            elif operation == "all":
+                result = ordered(library._videos.values(), by_position)
+            elif operation == "by_title":
+                result = ordered(library.iter_videos_by_title(), by_title)
+            elif operation == "search_titles":
+                result = ordered(library.search_titles(request[1]), by_title)
+            elif operation == "search_tags":
+                result = ordered(library.search_tags(request[1]), by_title)
+            elif operation == "set_flag":
+                result = library.set_flag(request[1], request[2])
+            else:
+                raise ValueError("Unknown shard request {0}".format(operation))
+        except Exception as e:
+            pending = []
+            connection.send((False, e))
+        else:
+            connection.send((True, result))
+
+
+class ShardedVideoLibrary(VideoLibrary):
+    """A Video Library partitioned by video_id over worker processes.
+
+    Each shard is a VideoLibrary living in its own process. Lookups are
+    routed to the shard owning the video_id; listings and searches are
+    sent to every shard and the sorted partial answers are combined with
+    a k-way merge, so the order matches an unsharded library.
+    """
+
+    def __init__(self, catalog_path=None, shards=2,
+                 batch_size=DEFAULT_BATCH_SIZE, on_duplicate="last"):
+        """The ShardedVideoLibrary class is initialized.
+
+        Args:
+            catalog_path: Path of the catalog to load. Defaults to the
+                bundled videos.txt.
+            shards: Number of worker processes.
+            batch_size: Number of rows parsed before they are sent on to
+                the shards.
+            on_duplicate: What to do with a row whose video_id was already
+                loaded, one of DUPLICATE_POLICIES.
+        """
+        if shards < 1:
+            raise ValueError("shards must be a positive integer")
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if on_duplicate not in DUPLICATE_POLICIES:
+            raise ValueError(
+                "on_duplicate must be one of {0}".format(DUPLICATE_POLICIES))
+
+        self._reset(catalog_path)
+        self._on_duplicate = on_duplicate
+        self._batch_size = batch_size
+        self._next_position = 0
+        self._connections = []
+        self._workers = []
+        for _ in range(shards):
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_serve, args=(worker_connection, on_duplicate),
+                daemon=True)
+            worker.start()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+        self._record_source()
+        with open(self._catalog_path) as video_file:
+            self._distribute(parse_rows(read_rows(video_file)), False)
+
+    def close(self):
+        """Stops the shard processes."""
+        for connection in self._connections:
+            connection.send(("stop",))
+        for worker in self._workers:
+            worker.join()
+
+    def _receive(self, connection):
+        """Returns the answer of a shard, raising the errors it reports."""
+        ok, result = connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def _fan_out(self, *request):
+        """Sends a request to every shard and returns all their answers.
+
+        Every answer is read before the first reported error is raised,
+        so that no answer is left behind to be taken for the answer of a
+        later request.
+        """
+        for connection in self._connections:
+            connection.send(request)
+        replies = [connection.recv() for connection in self._connections]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def _route(self, video_id, *request):
+        """Sends a request to the shard owning video_id."""
+        connection = self._connections[
+            shard_of(video_id, len(self._connections))]
+        connection.send(request)
+        return self._receive(connection)
+
+    def _distribute(self, rows, appended):
+        """Streams catalog rows to their shards and applies them.
+
+        Nothing is applied unless every row parses and passes the
+        duplicate policy of its shard.
+
+        Returns:
+            The combined CatalogDelta of every shard.
+        """
+        next_position = self._next_position
+        if not appended:
+            self._next_position = 0
+        shards = len(self._connections)
+        try:
+            for batch in batched(rows, self._batch_size):
+                partitions = [[] for _ in range(shards)]
+                for title, url, tags in batch:
+                    partitions[shard_of(url, shards)].append(
+                        (self._next_position, title, url, tags))
+                    self._next_position += 1
+                for connection, partition in zip(self._connections,
+                                                 partitions):
+                    if partition:
+                        connection.send(("rows", partition))
+            if self._on_duplicate == "error":
+                self._fan_out("check", appended)
+        except Exception:
+            for connection in self._connections:
+                connection.send(("discard",))
+            self._next_position = next_position
+            raise
+
+        delta = CatalogDelta([], [], [])
+        for shard_delta in self._fan_out("apply", appended):
+            delta.added.extend(shard_delta.added)
+            delta.changed.extend(shard_delta.changed)
+            delta.removed.extend(shard_delta.removed)
+        return delta
+
+    def reload(self):
+        """Applies the changes made to the catalog file since it was loaded.
+
+        Returns:
+            A CatalogDelta with the added, changed and removed video_ids.
+            Within each list the ids are grouped by shard.
+        """
+        fingerprint = catalog_snapshot.source_fingerprint(self._catalog_path)
+        if fingerprint == self._source_fingerprint:
+            return CatalogDelta([], [], [])
+
+        old_size = self._source_fingerprint[1]
+        if self._is_append(fingerprint):
+            delta = self._distribute(
+                parse_range(self._catalog_path, old_size, fingerprint[1]),
+                True)
+        else:
+            with open(self._catalog_path) as video_file:
+                delta = self._distribute(
+                    parse_rows(read_rows(video_file)), False)
+        self._record_source()
+        self._fuzzy_index = None
+        self._regex_index = None
+        return delta
+
+    def _merge(self, *request):
+        """Fans a request out and k-way merges the ordered answers."""
+        answers = self._fan_out(*request)
+        return [_unpack(fields) for _, fields in
+                heapq.merge(*answers, key=lambda item: item[0])]
+
+    def iter_videos(self):
+        """Iterates over the merged videos of every shard in catalog order."""
+        return iter(self._merge("all"))
+
+    def iter_videos_by_title(self):
+        """Iterates over the merged title ordered videos of every shard."""
+        return iter(self._merge("by_title"))
+
+    def view_all_videos(self):
+        """Returns a read-only live view of the videos in catalog order."""
+        return CatalogView(self)
+
+    def count(self):
+        """Returns the number of videos held by all shards."""
+        return sum(self._fan_out("count"))
+
+    def count_flagged(self):
+        """Returns the number of flagged videos held by all shards."""
+        return sum(self._fan_out("count_flagged"))
+
+    def get_video(self, video_id):
+        """Returns the video object (title, url, tags) from the video library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The Video object for the requested video_id, fetched from the
+            owning shard. None if the video does not exist.
+        """
+        fields = self._route(video_id, "get", video_id)
+        return None if fields is None else _unpack(fields)
+
+    def search_titles(self, search_term):
+        """Returns the videos whose title contains search_term."""
+        return self._merge("search_titles", search_term)
+
+    def search_tags(self, video_tag):
+        """Returns the videos with a tag containing video_tag."""
+        return self._merge("search_tags", video_tag)
+
+    def set_flag(self, video_id, flagged):
+        """Stores the [is_flagged, reason] state of a video."""
+        self._route(video_id, "set_flag", video_id, flagged)
@@ -0,0 +1,308 @@
+"""A SQLite backed video library class."""
+
+from . import catalog_snapshot
+from .catalog_parser import batched, parse_range, parse_rows, read_rows
+from .video import Video
+from .video_library import CatalogDelta
+from .video_library import CatalogView
+from .video_library import DEFAULT_BATCH_SIZE
+from .video_library import DUPLICATE_POLICIES
+from .video_library import DuplicateVideoException
+from .video_library import VideoLibrary
+import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    title_folded TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    flagged INTEGER NOT NULL DEFAULT 0,
+    flag_reason TEXT NOT NULL DEFAULT '',
+    generation INTEGER NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS videos_position ON videos (position);
+CREATE INDEX IF NOT EXISTS videos_title ON videos (title, position);
+CREATE TABLE IF NOT EXISTS video_tags (
+    video_rowid INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    tag_folded TEXT NOT NULL,
+    PRIMARY KEY (video_rowid, position)
+);
+CREATE INDEX IF NOT EXISTS video_tags_tag ON video_tags (tag_folded);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+_VIDEO_COLUMNS = "videos.title, videos.video_id, videos.tags, " \
+                 "videos.flagged, videos.flag_reason"
+
+# Tags are stored joined on the catalog separator, which cannot occur
+# inside a tag.
+_TAG_SEPARATOR = ","
+
+
+class SqliteVideoLibrary(VideoLibrary):
+    """A Video Library stored in a local SQLite database.
+
+    Only the rows a command asks for are turned into Video objects, so
+    memory use does not grow with the catalog. Title and tag searches are
+    answered by SQL and return the same videos, in the same order, as the
+    in-memory library.
+    """
+
+    def __init__(self, database_path, catalog_path=None,
+                 batch_size=DEFAULT_BATCH_SIZE, on_duplicate="last"):
+        """The SqliteVideoLibrary class is initialized.
+
+        The database is (re)built from the catalog when it was made from
+        another version of the catalog, and reused as it is otherwise.
+
+        Args:
+            database_path: The SQLite database file, created if needed.
+            catalog_path: Path of the catalog to load. Defaults to the
+                bundled videos.txt.
+            batch_size: Number of rows inserted per statement batch.
+            on_duplicate: What to do with a row whose video_id was already
+                loaded, one of DUPLICATE_POLICIES.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if on_duplicate not in DUPLICATE_POLICIES:
+            raise ValueError(
+                "on_duplicate must be one of {0}".format(DUPLICATE_POLICIES))
+
+        self._reset(catalog_path)
+        self._on_duplicate = on_duplicate
+        self._batch_size = batch_size
+        self._db = sqlite3.connect(str(database_path))
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            # Flags belong to a player session, like they do in memory.
+            self._db.execute(
+                "UPDATE videos SET flagged = 0, flag_reason = '' "
+                "WHERE flagged != 0")
+
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        if "mtime_ns" in meta:
+            self._source_fingerprint = (meta["mtime_ns"], meta["size"])
+            self._source_digest = meta["digest"]
+            self._generation = meta["generation"]
+            self.reload()
+        else:
+            self._generation = 0
+            with self._db:
+                self._import(self._read_catalog())
+                self._save_source()
+
+    def close(self):
+        """Closes the database connection."""
+        self._db.close()
+
+    def _read_catalog(self):
+        """Lazily yields every (title, video_id, tags) row of the catalog."""
+        with open(self._catalog_path) as video_file:
+            yield from parse_rows(read_rows(video_file))
+
+    def _save_source(self):
+        """Records the catalog state the database corresponds to."""
+        self._record_source()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ("mtime_ns", self._source_fingerprint[0]),
+                ("size", self._source_fingerprint[1]),
+                ("digest", self._source_digest),
+                ("generation", self._generation),
+            ])
+
+    def _import(self, rows, delta=None):
+        """Upserts catalog rows, stamping them with the current generation.
+
+        Every video takes the catalog position of its first row in the
+        generation, which orders the videos like a fresh load would.
+
+        Args:
+            rows: Iterable of (title, video_id, tags) tuples.
+            delta: Optional CatalogDelta collecting added and changed ids.
+        """
+        added = set()
+        position = self._db.execute(
+            "SELECT coalesce(max(position) + 1, 0) FROM videos "
+            "WHERE generation = ?", (self._generation,)).fetchone()[0]
+        for batch in batched(rows, self._batch_size):
+            for title, url, tags in batch:
+                tags = _TAG_SEPARATOR.join(tags)
+                existing = self._db.execute(
+                    "SELECT rowid, title, tags, generation FROM videos "
+                    "WHERE video_id = ?", (url,)).fetchone()
+                if existing is None:
+                    rowid = self._db.execute(
+                        "INSERT INTO videos (video_id, title, title_folded, "
+                        "tags, generation, position) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (url, title, title.lower(), tags, self._generation,
+                         position),
+                    ).lastrowid
+                    position += 1
+                    if delta is not None:
+                        delta.added.append(url)
+                        added.add(url)
+                else:
+                    rowid, old_title, old_tags, generation = existing
+                    if generation == self._generation:
+                        if self._on_duplicate == "first":
+                            continue
+                        if self._on_duplicate == "error":
+                            raise DuplicateVideoException(
+                                "Duplicate video_id in catalog: {0}".format(
+                                    url))
+                    self._db.execute(
+                        "UPDATE videos SET title = ?, title_folded = ?, "
+                        "tags = ?, position = CASE WHEN generation = ? "
+                        "THEN position ELSE ? END, generation = ? "
+                        "WHERE rowid = ?",
+                        (title, title.lower(), tags, self._generation,
+                         position, self._generation, rowid))
+                    if generation != self._generation:
+                        position += 1
+                    if old_title == title and old_tags == tags:
+                        continue
+                    if delta is not None and url not in added:
+                        delta.changed.append(url)
+                    self._db.execute(
+                        "DELETE FROM video_tags WHERE video_rowid = ?",
+                        (rowid,))
+
+                self._db.executemany(
+                    "INSERT INTO video_tags (video_rowid, position, "
+                    "tag_folded) VALUES (?, ?, ?)",
+                    [(rowid, index, tag.lower()) for index, tag
+                     in enumerate(tags.split(_TAG_SEPARATOR)) if tag])
+
+    def reload(self):
+        """Applies the changes made to the catalog file since it was loaded.
+
+        An appended tail is upserted on its own; any other change
+        re-imports the whole catalog and deletes the rows it no longer
+        contains. Everything happens in one transaction, so readers
+        switch from the old catalog to the new one atomically.
+
+        Returns:
+            A CatalogDelta with the added, changed and removed video_ids.
+        """
+        fingerprint = catalog_snapshot.source_fingerprint(self._catalog_path)
+        delta = CatalogDelta([], [], [])
+        if fingerprint == self._source_fingerprint:
+            return delta
+
+        old_size = self._source_fingerprint[1]
+        generation = self._generation
+        try:
+            self._import_changes(fingerprint, old_size, delta)
+        except Exception:
+            # The transaction was rolled back, the generation goes with it.
+            self._generation = generation
+            raise
+        self._fuzzy_index = None
+        self._regex_index = None
+        return delta
+
+    def _import_changes(self, fingerprint, old_size, delta):
+        """Applies a reload in one transaction, filling in delta."""
+        with self._db:
+            if self._is_append(fingerprint):
+                # Rows loaded earlier count as already seen for the
+                # duplicate policy.
+                self._import(
+                    parse_range(self._catalog_path, old_size, fingerprint[1]),
+                    delta)
+            else:
+                self._generation += 1
+                self._import(self._read_catalog(), delta)
+                delta.removed.extend(url for url, in self._db.execute(
+                    "SELECT video_id FROM videos WHERE generation != ? "
+                    "ORDER BY position", (self._generation,)))
+                self._db.execute(
+                    "DELETE FROM video_tags WHERE video_rowid IN "
+                    "(SELECT rowid FROM videos WHERE generation != ?)",
+                    (self._generation,))
+                self._db.execute(
+                    "DELETE FROM videos WHERE generation != ?",
+                    (self._generation,))
+            self._save_source()
+
+    @staticmethod
+    def _to_video(row):
+        """Turns a row selected with _VIDEO_COLUMNS into a Video."""
+        title, url, tags, flagged, flag_reason = row
+        video = Video(title, url, tags.split(_TAG_SEPARATOR) if tags else [])
+        if flagged:
+            video.flagged = [True, flag_reason]
+        return video
+
+    def iter_videos(self):
+        """Iterates over the videos in catalog order, one row at a time."""
+        return map(self._to_video, self._db.execute(
+            "SELECT {0} FROM videos ORDER BY position".format(
+                _VIDEO_COLUMNS)))
+
+    def iter_videos_by_title(self):
+        """Iterates over the videos in title order using the title index."""
+        return map(self._to_video, self._db.execute(
+            "SELECT {0} FROM videos ORDER BY title, position".format(
+                _VIDEO_COLUMNS)))
+
+    def view_all_videos(self):
+        """Returns a read-only live view of the videos in catalog order."""
+        return CatalogView(self)
+
+    def count(self):
+        """Returns the number of videos in the database."""
+        return self._db.execute("SELECT count(*) FROM videos").fetchone()[0]
+
+    def count_flagged(self):
+        """Returns the number of flagged videos in the database."""
+        return self._db.execute(
+            "SELECT count(*) FROM videos WHERE flagged != 0").fetchone()[0]
+
+    def get_video(self, video_id):
+        """Returns the video object (title, url, tags) from the video library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            A Video built from the database row for the requested video_id.
+            None if the video does not exist.
+        """
+        row = self._db.execute(
+            "SELECT {0} FROM videos WHERE video_id = ?".format(_VIDEO_COLUMNS),
+            (video_id,)).fetchone()
+        return None if row is None else self._to_video(row)
+
+    def search_titles(self, search_term):
+        """Returns the videos whose title contains search_term."""
+        return [self._to_video(row) for row in self._db.execute(
+            "SELECT {0} FROM videos WHERE instr(title_folded, ?) > 0 "
+            "ORDER BY title, position".format(_VIDEO_COLUMNS),
+            (search_term.lower(),))]
+
+    def search_tags(self, video_tag):
+        """Returns the videos with a tag containing video_tag."""
+        return [self._to_video(row) for row in self._db.execute(
+            "SELECT {0} FROM videos WHERE rowid IN ("
+            "SELECT video_rowid FROM video_tags "
+            "WHERE instr(tag_folded, ?) > 0) "
+            "ORDER BY title, position".format(_VIDEO_COLUMNS),
+            (video_tag.lower(),))]
+
+    def set_flag(self, video_id, flagged):
+        """Stores the [is_flagged, reason] state of a video."""
+        with self._db:
+            self._db.execute(
+                "UPDATE videos SET flagged = ?, flag_reason = ? "
+                "WHERE video_id = ?",
+                (int(flagged[0]), flagged[1], video_id))
@@ -0,0 +1,182 @@
+"""Suffix arrays over the video titles."""
+
+from array import array
+from bisect import bisect_right
+
+# Separates the titles in the indexed text. It cannot occur in a catalog
+# title, so no match spans two titles.
+_SEPARATOR = "\0"
+
+# Number of titles sorted into the smallest suffix array. Titles added
+# since the last array was built are scanned until there are this many of
+# them.
+SEGMENT_SIZE = 4096
+
+
+def build_suffix_array(text):
+    """Returns the suffix array of text, a run of separated titles.
+
+    No title holds the separator, so the order of two suffixes is settled
+    by the end of the shorter one's title: each suffix is sorted on the
+    rest of its own title, short keys a plain sort handles quickly. The
+    suffixes starting at a separator are left out, no search term starts
+    with one.
+    """
+    positions = []
+    keys = []
+    start = 0
+    for title in text.split(_SEPARATOR):
+        for offset in range(len(title)):
+            positions.append(start + offset)
+            keys.append(title[offset:])
+        start += len(title) + len(_SEPARATOR)
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return array("I", [positions[index] for index in order])
+
+
+def _level(count):
+    """Returns the level of a segment of count titles.
+
+    Segments of level k hold from 2**k to 2**(k + 1) times SEGMENT_SIZE
+    titles.
+    """
+    return (count // SEGMENT_SIZE).bit_length() - 1
+
+
+class _Segment:
+    """A suffix array over the titles of a fixed list of videos."""
+
+    def __init__(self, videos) -> None:
+        self.videos = videos
+        self.stale = 0
+        self.level = _level(len(videos))
+        self._starts = []
+        position = 0
+        titles = []
+        for video in videos:
+            title = video.title.lower()
+            self._starts.append(position)
+            titles.append(title)
+            position += len(title) + len(_SEPARATOR)
+        self._text = _SEPARATOR.join(titles) + _SEPARATOR
+        self._suffixes = build_suffix_array(self._text)
+
+    def _range(self, term):
+        """Returns the [low, high) range of suffixes starting with term."""
+        text, suffixes, size = self._text, self._suffixes, len(term)
+        low, high = 0, len(suffixes)
+        while low < high:
+            mid = (low + high) // 2
+            start = suffixes[mid]
+            if text[start:start + size] < term:
+                low = mid + 1
+            else:
+                high = mid
+        first = low
+        high = len(suffixes)
+        while low < high:
+            mid = (low + high) // 2
+            start = suffixes[mid]
+            if text[start:start + size] == term:
+                low = mid + 1
+            else:
+                high = mid
+        return first, low
+
+    def search(self, term):
+        """Returns the videos whose title contains the case-folded term."""
+        first, last = self._range(term)
+        return [self.videos[bisect_right(self._starts, start) - 1]
+                for start in self._suffixes[first:last]]
+
+
+class SuffixArrayTitleIndex:
+    """A class used to find titles containing a term with suffix arrays.
+
+    The titles are split into segments. The case-folded titles of a
+    segment are concatenated and every suffix of the text is sorted, so
+    the suffixes starting with a term form one contiguous range found with
+    two binary searches. A search merges the matches of every segment with
+    a scan of the fewer than SEGMENT_SIZE titles not yet in one.
+
+    Segments are kept in levels of doubling sizes, at most one per level:
+    a new segment taking an occupied level is merged with the segment
+    there, like a carry in binary addition. n titles thus make at most
+    log2(n / SEGMENT_SIZE) + 1 segments, each searched in logarithmic
+    time, and every title is sorted again O(log n) times over the life
+    of the index.
+
+    The arrays are built as the titles are added, never by a search. A
+    removed video stays in its segment, hidden from the results, until
+    half the segment is stale and its live titles are sorted again.
+    """
+
+    def __init__(self) -> None:
+        self._videos = {}
+        self._pending = {}
+        self._levels = {}
+        self._segment_of = {}
+
+    def __len__(self) -> int:
+        return len(self._videos)
+
+    def add(self, video) -> None:
+        """Indexes the title of a video."""
+        self._videos[video.row] = video
+        self._pending[video.row] = video
+        if len(self._pending) >= SEGMENT_SIZE:
+            self._seal()
+
+    def remove(self, video) -> None:
+        """Removes a video indexed by add."""
+        del self._videos[video.row]
+        if self._pending.pop(video.row, None) is not None:
+            return
+        segment = self._segment_of.pop(video.row)
+        segment.stale += 1
+        if segment.stale * 2 > len(segment.videos):
+            del self._levels[segment.level]
+            for live in self._live(segment):
+                del self._segment_of[live.row]
+                self._pending[live.row] = live
+            if len(self._pending) >= SEGMENT_SIZE:
+                self._seal()
+
+    def _live(self, segment):
+        """Returns the videos of a segment that were not removed."""
+        return [video for video in segment.videos
+                if self._segment_of.get(video.row) is segment]
+
+    def _seal(self):
+        """Sorts the pending titles into a new segment.
+
+        Segments already holding its level are merged into it first, so
+        each level keeps a single segment.
+        """
+        videos = list(self._pending.values())
+        self._pending = {}
+        while _level(len(videos)) in self._levels:
+            older = self._levels.pop(_level(len(videos)))
+            videos = self._live(older) + videos
+        segment = _Segment(videos)
+        self._levels[segment.level] = segment
+        for video in segment.videos:
+            self._segment_of[video.row] = segment
+
+    def search(self, term):
+        """Returns the videos whose title contains term, ignoring case.
+
+        The videos are returned in no particular order.
+        """
+        term = term.lower()
+        if not term:
+            return list(self._videos.values())
+        found = {}
+        for segment in self._levels.values():
+            for video in segment.search(term):
+                if self._segment_of.get(video.row) is segment:
+                    found[video.row] = video
+        for row, video in self._pending.items():
+            if video.title.lower().find(term) != -1:
+                found[row] = video
+        return list(found.values())
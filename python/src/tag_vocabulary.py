@@ -0,0 +1,70 @@
+"""A shared vocabulary of video tags."""
+
+from .search_index import TrigramIndex
+from typing import Dict, Set, Tuple
+import sys
+
+
+class TagSet(tuple):
+    """An immutable tuple of tag strings shared by every video using it.
+
+    Besides the strings it carries their vocabulary codes, so tag
+    comparisons can be done on small integers.
+    """
+
+    def __new__(cls, tags, codes):
+        tag_set = super().__new__(cls, tags)
+        tag_set.codes = codes
+        return tag_set
+
+    def __reduce__(self):
+        # Codes only mean something to the vocabulary that made them, so
+        # other processes receive a plain tuple.
+        return tuple, (tuple(self),)
+
+
+class TagVocabulary:
+    """A class used to dictionary-encode and hash-cons catalog tags."""
+
+    def __init__(self) -> None:
+        self._codes: Dict[str, int] = {}
+        self._folded = []
+        self._grams = TrigramIndex()
+        self._tag_sets: Dict[Tuple[int, ...], TagSet] = {}
+        # The same TagSets keyed by their strings, which spares encoding
+        # tag lists seen before.
+        self._by_tags: Dict[Tuple[str, ...], TagSet] = {}
+
+    def __len__(self) -> int:
+        return len(self._folded)
+
+    def code(self, tag) -> int:
+        """Returns the code of a tag, adding it to the vocabulary if new."""
+        code = self._codes.get(tag)
+        if code is None:
+            code = self._codes[sys.intern(tag)] = len(self._folded)
+            self._folded.append(tag.lower())
+            self._grams.add(code, self._folded[code])
+        return code
+
+    def encode(self, tags) -> TagSet:
+        """Returns the shared TagSet holding the given tags."""
+        tags = tuple(tags)
+        tag_set = self._by_tags.get(tags)
+        if tag_set is not None:
+            return tag_set
+        codes = tuple(self.code(tag) for tag in tags)
+        tag_set = self._tag_sets.get(codes)
+        if tag_set is None:
+            tag_set = self._tag_sets[codes] = TagSet(
+                (sys.intern(tag) for tag in tags), codes)
+        self._by_tags[tag_set] = tag_set
+        return tag_set
+
+    def matching(self, term) -> Set[int]:
+        """Returns the codes of the tags containing term, ignoring case."""
+        term = term.lower()
+        codes = self._grams.candidates(term)
+        if codes is None:
+            return set(range(len(self._folded)))
+        return {code for code in codes if self._folded[code].find(term) != -1}
@@ -2,19 +2,110 @@
 
 from typing import Sequence
 
+try:
+    import numpy
+except ImportError:  # NumPy is optional; the kernel falls back to Python.
+    numpy = None
+
+
+def unflagged_rows(bitmap, rows):
+    """Returns the rows among rows whose bit is clear in a flag bitmap.
+
+    Args:
+        bitmap: A FlagTable bitmap, bit row & 7 of byte row >> 3 being
+            set for the flagged rows.
+        rows: The rows to filter.
+    """
+    if numpy is None:
+        return [row for row in rows
+                if not bitmap[row >> 3] & (1 << (row & 7))]
+    rows = numpy.fromiter(rows, dtype=numpy.intp)
+    if not len(rows):
+        return []
+    bits = numpy.frombuffer(bitmap, dtype=numpy.uint8)[rows >> 3]
+    return rows[(bits >> (rows & 7)) & 1 == 0].tolist()
+
+
+class FlagTable:
+    """A class used to hold the flag state of many videos.
+
+    Each video owns a row: whether it is flagged is one bit of a shared
+    bitmap and the reasons of the few flagged videos live in a dict.
+    """
+
+    def __init__(self) -> None:
+        self._bitmap = bytearray()
+        self._reasons = {}
+        self._rows = 0
+
+    def __len__(self) -> int:
+        """Returns the number of allocated rows."""
+        return self._rows
+
+    def allocate(self) -> int:
+        """Reserves an unflagged row and returns its number."""
+        row = self._rows
+        self._rows += 1
+        if row >> 3 >= len(self._bitmap):
+            self._bitmap.append(0)
+        return row
+
+    def is_flagged(self, row) -> bool:
+        """Returns whether the video at row is flagged."""
+        return bool(self._bitmap[row >> 3] & (1 << (row & 7)))
+
+    def reason(self, row) -> str:
+        """Returns the flag reason of the video at row."""
+        return self._reasons.get(row, "")
+
+    def set(self, row, flagged, reason="") -> None:
+        """Flags or unflags the video at row."""
+        if flagged:
+            self._bitmap[row >> 3] |= 1 << (row & 7)
+            self._reasons[row] = reason
+        else:
+            self._bitmap[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+            self._reasons.pop(row, None)
+
+    def unflagged(self, rows):
+        """Returns the rows among rows whose video is not flagged."""
+        return unflagged_rows(self._bitmap, rows)
+
+    def flagged_rows(self):
+        """Returns the rows of all flagged videos."""
+        return self._reasons.keys()
+
 
 class Video:
     """A class used to represent a Video."""
 
-    def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str]):
-        """Video constructor."""
+    __slots__ = ("_title", "_video_id", "_tags", "_flags", "_row")
+
+    def __init__(self, video_title: str, video_id: str,
+                 video_tags: Sequence[str], flags: FlagTable = None,
+                 row: int = None):
+        """Video constructor.
+
+        Args:
+            video_title: The title of the video.
+            video_id: The video url.
+            video_tags: The tags of the video.
+            flags: The FlagTable holding the flag state of the video. A
+                video without one gets a private table once it is flagged.
+            row: The row of the video in flags, allocated when omitted.
+        """
         self._title = video_title
         self._video_id = video_id
 
         # Turn the tags into a tuple here so it's unmodifiable,
-        # in case the caller changes the 'video_tags' they passed to us
-        self._tags = tuple(video_tags)
-        self._flagged = [False, ""]
+        # in case the caller changes the 'video_tags' they passed to us.
+        # Tuples (such as shared TagSets) are kept as they are.
+        self._tags = video_tags if isinstance(video_tags, tuple) \
+            else tuple(video_tags)
+        self._flags = flags
+        self._row = row
+        if flags is not None and row is None:
+            self._row = flags.allocate()
 
     @property
     def title(self) -> str:
@@ -31,11 +122,24 @@ class Video:
         """Returns the list of tags of a video."""
         return self._tags
 
+    @property
+    def row(self) -> int:
+        """Returns the row of the video in its FlagTable."""
+        return self._row
+
     @property
     def flagged(self) -> Sequence:
         """Returns if the current video is flagged"""
-        return self._flagged
+        if self._flags is None:
+            return [False, ""]
+        return [self._flags.is_flagged(self._row),
+                self._flags.reason(self._row)]
 
     @flagged.setter
     def flagged(self, val) -> None:
-        self._flagged = val
+        if self._flags is None:
+            if not val[0]:
+                return
+            self._flags = FlagTable()
+            self._row = self._flags.allocate()
+        self._flags.set(self._row, val[0], val[1])
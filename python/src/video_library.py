@@ -1,36 +1,567 @@
 """A video library class."""
 
-from .video import Video
+from . import catalog_snapshot
+from . import regex_trigrams
+from .aho_corasick import AhoCorasick
+from .catalog_parser import batched, parse_parallel, parse_range
+from .catalog_parser import parse_rows, read_rows
+from .catalog_snapshot import SnapshotException
+from .columnar import ColumnarTitleScan
+from .fuzzy_index import FuzzyIndex
+from .query import QueryException, QueryPlanner, parse
+from .search_index import TagIndex, TitleScan, TitleTrigramIndex
+from .search_index import TrigramIndex
+from .suffix_array import SuffixArrayTitleIndex
+from .tag_vocabulary import TagVocabulary
+from .video import FlagTable, Video
+from bisect import bisect_left, insort
 from pathlib import Path
-import csv
+from typing import List, NamedTuple
+import base64
+import heapq
+import re
+import sys
+import time
 
+# Catalog that ships with the player.
+DEFAULT_CATALOG = Path(__file__).parent / "videos.txt"
 
-# Helper Wrapper around CSV reader to strip whitespace from around
-# each item.
-def _csv_reader_with_strip(reader):
-    yield from ((item.strip() for item in line) for line in reader)
+# Maximum number of raw catalog rows held in memory at once while loading.
+DEFAULT_BATCH_SIZE = 10000
+
+# Policies for a catalog row whose video_id was already loaded.
+# "last" replaces the earlier video but keeps its position in the
+# library, "first" ignores the later row and "error" raises
+# DuplicateVideoException.
+DUPLICATE_POLICIES = ("last", "first", "error")
+
+# Engines that can answer title searches: a trigram index, a suffix
+# array (slower to build, but it never verifies false candidates), a
+# plain scan or a columnar scan (vectorized when NumPy is installed).
+TITLE_SEARCH_ENGINES = {
+    "trigram": TitleTrigramIndex,
+    "suffix_array": SuffixArrayTitleIndex,
+    "scan": TitleScan,
+    "columnar": ColumnarTitleScan,
+}
+
+# Videos examined by a budgeted search between two looks at the clock.
+DEADLINE_CHECK_INTERVAL = 256
+
+
+class DuplicateVideoException(Exception):
+    """A class to represent a catalog row reusing an existing video_id."""
+    pass
+
+
+class CatalogDelta(NamedTuple):
+    """The video_ids touched by a catalog reload."""
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+
+
+class PartialResults(NamedTuple):
+    """The outcome of a search that may have stopped early."""
+    videos: List[Video]
+    # Whether the search stopped before reaching the end of the catalog.
+    truncated: bool
+    # The videos of the catalog, in title order, the search got through.
+    scanned: int
+    total: int
+
+
+def deadline_after(time_budget):
+    """Returns the time.monotonic() deadline of a budget, None if unbounded."""
+    if time_budget is None:
+        return None
+    return time.monotonic() + time_budget
+
+
+def encode_cursor(video):
+    """Returns the opaque cursor of the search page ending with video."""
+    position = "{0}\0{1}".format(video.title, video.video_id)
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Returns the (title, video_id) position stored in a cursor."""
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        title, video_id = position.decode("utf-8").split("\0")
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid search cursor: {0}".format(cursor))
+    return title, video_id
+
+
+def _page(videos, limit, cursor):
+    """Selects the first limit unflagged videos after a cursor.
+
+    Pages are keyed by (title, video_id) rather than by offset, so a page
+    stays put when videos are flagged or allowed between two requests.
+    """
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    after = decode_cursor(cursor) if cursor is not None else None
+    candidates = (video for video in videos
+                  if not video.flagged[0]
+                  and (after is None or (video.title, video.video_id) > after))
+    page = heapq.nsmallest(limit + 1, candidates,
+                           key=lambda x: (x.title, x.video_id))
+    if len(page) > limit:
+        return page[:limit], encode_cursor(page[limit - 1])
+    return page, None
+
+
+class CatalogView:
+    """A read-only, live view of the videos of a library.
+
+    Iterating does not copy the catalog and len() is constant time.
+    """
+
+    def __init__(self, library):
+        self._library = library
+
+    def __len__(self):
+        return self._library.count()
+
+    def __iter__(self):
+        return self._library.iter_videos()
 
 
 class VideoLibrary:
     """A class used to represent a Video Library."""
 
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
+    def __init__(self, catalog_path=None, batch_size=DEFAULT_BATCH_SIZE,
+                 progress=None, workers=1, on_duplicate="last",
+                 title_search="trigram"):
+        """The VideoLibrary class is initialized.
+
+        Args:
+            catalog_path: Path of the catalog to load. Defaults to the
+                bundled videos.txt.
+            batch_size: Maximum number of raw rows held in memory while
+                the catalog is being loaded by a single process.
+            progress: Optional callable invoked with the number of rows
+                loaded so far after every batch.
+            workers: Number of processes parsing the catalog. With more
+                than one, the file is split into line-aligned byte ranges
+                that are parsed in parallel and merged in file order.
+            on_duplicate: What to do with a row whose video_id was already
+                loaded, one of DUPLICATE_POLICIES.
+            title_search: The engine answering title searches, one of the
+                keys of TITLE_SEARCH_ENGINES.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if workers < 1:
+            raise ValueError("workers must be a positive integer")
+        if on_duplicate not in DUPLICATE_POLICIES:
+            raise ValueError(
+                "on_duplicate must be one of {0}".format(DUPLICATE_POLICIES))
+        if title_search not in TITLE_SEARCH_ENGINES:
+            raise ValueError("title_search must be one of {0}".format(
+                tuple(TITLE_SEARCH_ENGINES)))
+
+        self._reset(catalog_path)
+        self._on_duplicate = on_duplicate
+        self._title_search = title_search
+        if workers > 1:
+            self._load_parallel(workers, progress)
+        else:
+            self._load(batch_size, progress)
+        self._index_catalog()
+
+    def _reset(self, catalog_path):
+        """Sets up an empty library for the given catalog."""
         self._videos = {}
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                )
+        self._vocabulary = TagVocabulary()
+        self._flags = FlagTable()
+        self._catalog_path = Path(catalog_path or DEFAULT_CATALOG)
+        self._source_fingerprint = None
+        self._source_digest = None
+        self._on_duplicate = "last"
+        # The catalog position of every video_id, in order of first
+        # appearance, like a fresh load sees them.
+        self._positions = {}
+        # (title, position, video) entries kept sorted, so listings come
+        # out in title order, ties in catalog order, without sorting per
+        # command.
+        self._title_index = []
+        self._title_search = "trigram"
+        # Built by _index_catalog. Libraries that keep their videos
+        # elsewhere never build them and fall back to scans.
+        self._title_engine = None
+        self._tag_index = None
+        # Set by a start from a snapshot, which leaves the title engine
+        # and the tag index to the first search that needs them.
+        self._engines_deferred = False
+        # Built on the first fuzzy search, and on the first regex search
+        # by libraries without a trigram title engine; most sessions never
+        # need them.
+        self._fuzzy_index = None
+        self._regex_index = None
+
+    def _index_catalog(self):
+        """Builds the search indexes once the catalog has been loaded."""
+        (self._title_index, self._title_engine,
+         self._tag_index) = self._build_indexes(self._videos, self._positions)
+        self._fuzzy_index = None
+        self._regex_index = None
+
+    def _build_indexes(self, videos, positions):
+        """Returns new search indexes of videos, an id map.
+
+        Args:
+            videos: Dict mapping video_ids to their Video.
+            positions: Dict mapping video_ids to their catalog position.
+
+        Returns:
+            The (title_index, title_engine, tag_index) tuple.
+        """
+        title_index = sorted((video.title, positions[video.video_id], video)
+                             for video in videos.values())
+        return (title_index,) + self._build_engines(videos.values())
+
+    def _build_engines(self, videos):
+        """Returns a new (title_engine, tag_index) pair indexing videos."""
+        title_engine = TITLE_SEARCH_ENGINES[self._title_search]()
+        tag_index = TagIndex(self._vocabulary)
+        for video in videos:
+            title_engine.add(video)
+            tag_index.add(video)
+        return title_engine, tag_index
+
+    def _build_deferred_engines(self):
+        """Builds the engines a start from a snapshot left for later."""
+        if self._engines_deferred:
+            self._engines_deferred = False
+            self._title_engine, self._tag_index = self._build_engines(
+                self._videos.values())
+
+    def _reindex(self, added, removed):
+        """Updates the search indexes for a small appended reload.
+
+        The title engines are updated in place, the title index is copied
+        so the caller can swap it in along with the new id map. Every
+        video must already have its position in _positions.
+
+        Args:
+            added: The Video objects that entered the library.
+            removed: The Video objects that left it, including the old
+                versions of changed videos.
+
+        Returns:
+            The new title index.
+        """
+        title_index = list(self._title_index)
+        for video in removed:
+            del title_index[bisect_left(
+                title_index,
+                (video.title, self._positions[video.video_id]))]
+        for video in added:
+            insort(title_index,
+                   (video.title, self._positions[video.video_id], video))
+        self._update_engines(added, removed)
+        return title_index
+
+    def _update_engines(self, added, removed):
+        """Applies a reload to the title engine and the other indexes."""
+        for video in removed:
+            self._title_engine.remove(video)
+            self._tag_index.remove(video)
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.remove(video.video_id, video.title)
+            if self._regex_index is not None:
+                self._regex_index.remove(video.video_id, video.title.lower())
+        for video in added:
+            self._title_engine.add(video)
+            self._tag_index.add(video)
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.add(video.video_id, video.title)
+            if self._regex_index is not None:
+                self._regex_index.add(video.video_id, video.title.lower())
+
+    def _record_source(self):
+        """Remembers the catalog state the loaded videos correspond to."""
+        self._source_fingerprint = catalog_snapshot.source_fingerprint(
+            self._catalog_path)
+        self._source_digest = catalog_snapshot.source_digest(
+            self._catalog_path, self._source_fingerprint[1])
+
+    def _load(self, batch_size, progress):
+        """Streams the catalog into the id map one batch at a time."""
+        loaded = 0
+        self._record_source()
+        with open(self._catalog_path) as video_file:
+            for batch in batched(read_rows(video_file), batch_size):
+                self._add_rows(parse_rows(batch))
+                loaded += len(batch)
+                if progress is not None:
+                    progress(loaded)
+
+    def _load_parallel(self, workers, progress):
+        """Parses the catalog in worker processes and merges the results."""
+        loaded = 0
+        self._record_source()
+        for rows in parse_parallel(self._catalog_path, workers):
+            self._add_rows(rows)
+            loaded += len(rows)
+            if progress is not None:
+                progress(loaded)
+
+    def _keep_row(self, url, seen):
+        """Applies the duplicate policy to a row about to be stored.
+
+        Returns:
+            False if the row must be skipped because seen already holds
+            its video_id and the first occurrence wins.
+        """
+        if url in seen:
+            if self._on_duplicate == "first":
+                return False
+            if self._on_duplicate == "error":
+                raise DuplicateVideoException(
+                    "Duplicate video_id in catalog: {0}".format(url))
+        return True
+
+    def _add_rows(self, rows):
+        """Adds parsed rows to the id map honouring the duplicate policy."""
+        for title, url, tags in rows:
+            current = self._videos.get(url)
+            if current is None:
+                self._positions[url] = len(self._positions)
+                self._videos[url] = self._make_video(title, url, tags)
+            elif self._keep_row(url, self._videos):
+                # A replaced row keeps its flag row and its position.
+                self._videos[url] = self._make_video(
+                    title, url, tags, current.row)
+
+    def _make_video(self, title, url, tags, row=None):
+        """Builds a Video with interned strings and a shared TagSet.
+
+        Its flag state lives in the library's FlagTable, at a new row
+        unless the row of the video it replaces is given.
+        """
+        return Video(sys.intern(title), sys.intern(url),
+                     self._vocabulary.encode(tags), self._flags, row)
+
+    def reload(self):
+        """Applies the changes made to the catalog file since it was loaded.
+
+        When the file only grew and its previously loaded bytes still hash
+        to the same digest, just the appended tail is parsed. Otherwise the
+        whole file is re-read and compared row by row. Only the delta is
+        applied: unchanged videos are kept as they are and changed videos
+        keep their flag state. The new id map and title index are built
+        aside and swapped in together.
+
+        Returns:
+            A CatalogDelta with the added, changed and removed video_ids.
+        """
+        fingerprint = catalog_snapshot.source_fingerprint(self._catalog_path)
+        if fingerprint == self._source_fingerprint:
+            return CatalogDelta([], [], [])
+
+        old_size = self._source_fingerprint[1]
+        if self._is_append(fingerprint):
+            rows = parse_range(self._catalog_path, old_size, fingerprint[1])
+            delta = self._apply_rows(rows, appended=True)
+        else:
+            with open(self._catalog_path) as video_file:
+                delta = self._apply_rows(
+                    parse_rows(read_rows(video_file)), appended=False)
+        self._record_source()
+        return delta
+
+    def _apply_rows(self, rows, appended):
+        """Swaps in the id map described by a reload's catalog rows.
+
+        Args:
+            rows: Iterable of (title, video_id, tags) tuples.
+            appended: Whether rows only extend the loaded catalog, rather
+                than describe the whole of it.
+
+        Returns:
+            A CatalogDelta with the added, changed and removed video_ids.
+        """
+        self._build_deferred_engines()
+        # None stands for a loaded row the reload did not mention.
+        parsed = dict.fromkeys(self._videos) if appended else {}
+        for title, url, tags in rows:
+            if self._keep_row(url, parsed):
+                parsed[url] = (title, tags)
+
+        delta = CatalogDelta([], [], [])
+        videos = {}
+        added = []
+        removed = []
+        for url, row in parsed.items():
+            current = self._videos.get(url)
+            if row is None:
+                video = current
+            elif current is None:
+                video = self._make_video(row[0], url, row[1])
+                delta.added.append(url)
+                added.append(video)
+            elif current.title == row[0] and current.tags == tuple(row[1]):
+                video = current
+            else:
+                # Reusing the flag row keeps the flag state.
+                video = self._make_video(row[0], url, row[1], current.row)
+                delta.changed.append(url)
+                added.append(video)
+                removed.append(current)
+            videos[url] = video
+        dropped = [video for url, video in self._videos.items()
+                   if url not in videos]
+        delta.removed.extend(video.video_id for video in dropped)
+        removed.extend(dropped)
+
+        if appended:
+            # Appended videos go after the loaded ones, a replaced video
+            # keeps its position.
+            positions = self._positions
+            for video in added:
+                positions.setdefault(video.video_id, len(positions))
+        else:
+            positions = {url: position
+                         for position, url in enumerate(parsed)}
+
+        if (self._title_engine is None
+                or len(added) + len(removed) > len(self._title_index) // 8):
+            # Re-sorting beats many O(n) list insertions and deletions.
+            (title_index, self._title_engine,
+             self._tag_index) = self._build_indexes(videos, positions)
+            self._fuzzy_index = None
+            self._regex_index = None
+        elif appended:
+            title_index = self._reindex(added, removed)
+        else:
+            # Positions may all have shifted, but the kept entries stay
+            # nearly sorted, which the sort merges in linear time.
+            self._update_engines(added, removed)
+            title_index = [(title, positions[video.video_id], video)
+                           for title, _, video in self._title_index
+                           if videos.get(video.video_id) is video]
+            title_index.extend((video.title, positions[video.video_id], video)
+                               for video in added)
+            title_index.sort()
+        self._videos, self._positions, self._title_index = (
+            videos, positions, title_index)
+        for video in dropped:
+            self._flags.set(video.row, False)
+        return delta
+
+    def _is_append(self, fingerprint):
+        """Returns whether the catalog only grew since it was loaded.
+
+        That is the case when the previously loaded bytes are all still
+        there, end on a line boundary and hash to the recorded digest.
+        """
+        old_size = self._source_fingerprint[1]
+        if fingerprint[1] < old_size:
+            return False
+        if old_size > 0:
+            with open(self._catalog_path, "rb") as catalog_file:
+                catalog_file.seek(old_size - 1)
+                if catalog_file.read(1) != b"\n":
+                    return False
+        return catalog_snapshot.source_digest(
+            self._catalog_path, old_size) == self._source_digest
+
+    @classmethod
+    def from_snapshot(cls, path, catalog_path=None, title_search="trigram"):
+        """Builds a library from a snapshot written by save_snapshot.
+
+        Args:
+            path: The snapshot file.
+            catalog_path: The catalog the snapshot must be current for.
+                Defaults to the bundled videos.txt.
+            title_search: The engine answering title searches, one of the
+                keys of TITLE_SEARCH_ENGINES.
+
+        The snapshot holds the title order, so the listings need no sort.
+        The title engine and the tag index are only built by the first
+        search using them.
+
+        Raises:
+            SnapshotException: The snapshot is corrupt, of another version
+                or older than the catalog.
+        """
+        library = cls.__new__(cls)
+        library._reset(catalog_path)
+        library._title_search = title_search
+        with open(path, "rb") as snapshot_file:
+            buffer = snapshot_file.read()
+
+        header = catalog_snapshot.read_header(buffer)
+        library._source_fingerprint = catalog_snapshot.check_source(
+            header, library._catalog_path)
+        library._source_digest = header["digest"]
+        library._add_rows(catalog_snapshot.read_snapshot(buffer))
+        videos = list(library._videos.values())
+        library._title_index = [
+            (videos[position].title, position, videos[position])
+            for position in catalog_snapshot.read_title_order(buffer)]
+        library._engines_deferred = True
+        return library
+
+    def save_snapshot(self, path):
+        """Writes the catalog to a binary snapshot for fast startup.
+
+        Args:
+            path: Destination of the snapshot.
+
+        Raises:
+            SnapshotException: The catalog changed since it was loaded.
+        """
+        fingerprint = catalog_snapshot.source_fingerprint(self._catalog_path)
+        if fingerprint != self._source_fingerprint:
+            raise SnapshotException(
+                "Catalog {0} changed since it was loaded".format(
+                    self._catalog_path))
+
+        catalog_snapshot.write_snapshot(
+            path,
+            ((video.title, video.video_id, video.tags)
+             for video in self.iter_videos()),
+            fingerprint,
+            catalog_snapshot.source_digest(self._catalog_path),
+        )
 
     def get_all_videos(self):
         """Returns all available video information from the video library."""
-        return list(self._videos.values())
+        return list(self.iter_videos())
+
+    @property
+    def source_fingerprint(self):
+        """Returns the fingerprint of the catalog file the videos came from.
+
+        It changes whenever a reload applies changes made to the catalog,
+        so copies of the videos can tell when they are out of date.
+        """
+        return self._source_fingerprint
+
+    def count(self):
+        """Returns the number of videos in the library in constant time."""
+        return len(self._videos)
+
+    def count_flagged(self):
+        """Returns the number of flagged videos in the library."""
+        return len(self._flags.flagged_rows())
+
+    def iter_videos(self):
+        """Iterates over the videos in catalog order without copying."""
+        return iter(self._videos.values())
+
+    def view_all_videos(self):
+        """Returns a read-only live view of the videos in catalog order."""
+        return self._videos.values()
+
+    def iter_videos_by_title(self):
+        """Iterates over the videos in title order, ties in load order."""
+        return (entry[2] for entry in self._title_index)
 
     def get_video(self, video_id):
         """Returns the video object (title, url, tags) from the video library.
@@ -43,3 +574,385 @@ class VideoLibrary:
             does not exist.
         """
         return self._videos.get(video_id, None)
+
+    def _in_title_order(self, results):
+        """Orders the results of an index lookup like iter_videos_by_title."""
+        if len(results) * 8 > len(self._title_index):
+            # Filtering the title index is cheaper than sorting most of it.
+            video_ids = {video.video_id for video in results}
+            return [video for video in self.iter_videos_by_title()
+                    if video.video_id in video_ids]
+        positions = self._positions
+        results.sort(key=lambda x: (x.title, positions[x.video_id]))
+        return results
+
+    def search_titles(self, search_term):
+        """Returns the videos whose title contains search_term.
+
+        The match is case insensitive and the videos are ordered by title.
+        Flagged videos are included.
+        """
+        self._build_deferred_engines()
+        if self._title_engine is None:
+            return list(self.iter_search_titles(search_term))
+        return self._in_title_order(self._title_engine.search(search_term))
+
+    def search_tags(self, video_tag):
+        """Returns the videos with a tag containing video_tag.
+
+        The match is case insensitive and the videos are ordered by title.
+        A video is returned once, however many of its tags match. Flagged
+        videos are included.
+        """
+        self._build_deferred_engines()
+        if self._tag_index is None:
+            return list(self.iter_search_tags(video_tag))
+        return self._in_title_order(self._tag_index.search(video_tag))
+
+    def iter_search_titles(self, search_term, deadline=None):
+        """Yields the videos whose title contains search_term as found.
+
+        The videos come in title order from a scan of the title ordered
+        catalog, so the first ones are available long before the scan
+        ends. Flagged videos are included.
+
+        Args:
+            search_term: The query to be used in search.
+            deadline: Optional time.monotonic() value at which the scan
+                stops early.
+        """
+        search_term = search_term.lower()
+        return self._scan_by_title(
+            lambda video: video.title.lower().find(search_term) != -1,
+            deadline)
+
+    def iter_search_tags(self, video_tag, deadline=None):
+        """Yields the videos with a tag containing video_tag as found.
+
+        See iter_search_titles for the order of the videos and deadline.
+        """
+        video_tag = video_tag.lower()
+        return self._scan_by_title(
+            lambda video: any(tag.lower().find(video_tag) != -1
+                              for tag in video.tags),
+            deadline)
+
+    def _scan_by_title(self, matches, deadline):
+        """Yields the videos accepted by matches, in title order."""
+        for scanned, video in enumerate(self.iter_videos_by_title()):
+            if (deadline is not None and scanned
+                    and scanned % DEADLINE_CHECK_INTERVAL == 0
+                    and time.monotonic() >= deadline):
+                return
+            if matches(video):
+                yield video
+
+    def search_titles_within(self, search_term, time_budget=None,
+                             max_results=None):
+        """Returns the first unflagged videos whose title contains search_term.
+
+        The catalog is gone through in title order and the search stops
+        as soon as max_results videos are found or time_budget runs out,
+        so the videos found are always the first ones of the complete
+        answer. Candidates from the title engine are only verified and
+        ordered as far as the search gets.
+
+        Args:
+            search_term: The query to be used in search.
+            time_budget: Optional number of seconds the search may take.
+            max_results: Optional maximum number of videos returned.
+
+        Returns:
+            The PartialResults of the search.
+        """
+        deadline = deadline_after(time_budget)
+        term = search_term.lower()
+        rows = video_of = None
+        self._build_deferred_engines()
+        if isinstance(self._title_engine, TitleTrigramIndex):
+            rows = self._title_engine.candidates(term)
+            video_of = self._title_engine.video
+        elif isinstance(self._title_engine, SuffixArrayTitleIndex):
+            rows = {video.row: video
+                    for video in self._title_engine.search(term)}
+            video_of = rows.__getitem__
+        return self._walk_by_title(
+            rows, video_of,
+            lambda video: video.title.lower().find(term) != -1,
+            max_results, deadline)
+
+    def search_tags_within(self, video_tag, time_budget=None,
+                           max_results=None):
+        """Returns the first unflagged videos with a tag containing video_tag.
+
+        See search_titles_within for the arguments and the result.
+        """
+        deadline = deadline_after(time_budget)
+        tag = video_tag.lower()
+        rows = video_of = None
+        self._build_deferred_engines()
+        if self._tag_index is not None:
+            rows = self._tag_index.rows(tag)
+            video_of = self._tag_index.video
+        return self._walk_by_title(
+            rows, video_of,
+            lambda video: any(text.lower().find(tag) != -1
+                              for text in video.tags),
+            max_results, deadline)
+
+    def _walk_by_title(self, rows, video_of, matches, max_results,
+                       deadline):
+        """Goes through the catalog in title order for a bounded search.
+
+        A few candidates are sorted and visited on their own, many are
+        looked up while walking the title index. The clock is read every
+        DEADLINE_CHECK_INTERVAL videos, so the first ones are examined
+        even when the budget is already used up.
+
+        Args:
+            rows: The rows of the videos that may match, None if any may.
+            video_of: Callable returning the video of one of rows.
+            matches: Callable telling whether a candidate really matches.
+            max_results: Optional maximum number of videos kept.
+            deadline: Optional time.monotonic() value to stop at.
+
+        Returns:
+            The PartialResults of the walk, its progress counted in
+            videos of the catalog.
+        """
+        total = self.count()
+        wanted = None
+        candidates = None
+        if rows is not None and len(rows) * 8 <= total:
+            positions = self._positions
+            candidates = sorted(
+                map(video_of, rows),
+                key=lambda x: (x.title, positions[x.video_id]))
+            videos = candidates
+        else:
+            videos = self.iter_videos_by_title()
+            wanted = rows
+
+        kept = []
+        examined = 0
+        stopped = None
+        for video in videos:
+            if ((max_results is not None and len(kept) >= max_results)
+                    or (deadline is not None and examined
+                        and examined % DEADLINE_CHECK_INTERVAL == 0
+                        and time.monotonic() >= deadline)):
+                stopped = video
+                break
+            examined += 1
+            if wanted is not None and video.row not in wanted:
+                continue
+            if matches(video) and not video.flagged[0]:
+                kept.append(video)
+
+        if stopped is None:
+            scanned = total
+        elif videos is candidates:
+            # The catalog videos ordered before the first one not visited.
+            scanned = bisect_left(
+                self._title_index,
+                (stopped.title, self._positions[stopped.video_id]))
+        else:
+            scanned = examined
+        return PartialResults(kept, scanned < total, scanned, total)
+
+    def search_titles_batch(self, search_terms):
+        """Returns the videos whose title contains each of many terms.
+
+        The terms are compiled into one automaton and every title is
+        scanned once, instead of once per term. Matches are case
+        insensitive and flagged videos are included.
+
+        Args:
+            search_terms: The queries to be used in search.
+
+        Returns:
+            A dict mapping each term to the list of matching video_ids,
+            ordered by title.
+        """
+        # Repeated terms would report every match twice.
+        search_terms = list(dict.fromkeys(search_terms))
+        automaton = AhoCorasick(search_terms)
+        results = {term: [] for term in search_terms}
+        for video in self.iter_videos_by_title():
+            for index in automaton.matches(video.title):
+                results[search_terms[index]].append(video.video_id)
+        return results
+
+    def search_titles_fuzzy(self, search_term, max_edits=1):
+        """Returns the videos whose title has words close to search_term.
+
+        Every word of search_term must be within max_edits insertions,
+        deletions or substitutions of a word of the title, ignoring case.
+        The videos are ordered by title and flagged videos are included.
+
+        Args:
+            search_term: The query to be used in search.
+            max_edits: The edits tolerated per word, at most
+                fuzzy_index.MAX_EDITS.
+
+        Raises:
+            ValueError: max_edits is out of range.
+        """
+        video_ids = self._fuzzy_titles().search(search_term, max_edits)
+        return self._in_title_order(
+            [self.get_video(video_id) for video_id in video_ids])
+
+    def _fuzzy_titles(self):
+        """Returns the FuzzyIndex of the titles, building it if needed."""
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyIndex()
+            for video in self.iter_videos():
+                self._fuzzy_index.add(video.video_id, video.title)
+        return self._fuzzy_index
+
+    def search_titles_regex(self, pattern):
+        """Returns the videos whose title matches a regular expression.
+
+        The substrings every match must contain are derived from the
+        pattern and looked up in a trigram index of the titles; only the
+        titles having them are matched against the full pattern. The
+        match is case sensitive unless the pattern says otherwise, the
+        videos are ordered by title and flagged videos are included.
+
+        Args:
+            pattern: The regular expression, searched anywhere in titles.
+
+        Raises:
+            QueryException: The pattern is not a valid regular expression.
+        """
+        try:
+            regex = re.compile(pattern)
+            query = regex_trigrams.required_query(pattern, regex.flags)
+        except re.error as e:
+            raise QueryException(
+                "Invalid regular expression: {0}".format(e))
+
+        videos = self._regex_candidates(query)
+        if videos is None:
+            return [video for video in self.iter_videos_by_title()
+                    if regex.search(video.title)]
+        return self._in_title_order(
+            [video for video in videos if regex.search(video.title)])
+
+    def _regex_candidates(self, query):
+        """Returns the videos whose title may match a regex query.
+
+        The trigrams of the title engine are used when it has them.
+
+        Returns:
+            A list of videos, or None when every video is a candidate.
+        """
+        self._build_deferred_engines()
+        if self._title_search == "trigram" and self._title_engine is not None:
+            rows = regex_trigrams.candidates(
+                query, self._title_engine.candidates)
+            if rows is None:
+                return None
+            return [self._title_engine.video(row) for row in rows]
+        video_ids = regex_trigrams.candidates(
+            query, self._regex_titles().candidates)
+        if video_ids is None:
+            return None
+        return [self.get_video(video_id) for video_id in video_ids]
+
+    def _regex_titles(self):
+        """Returns the TrigramIndex of the titles, building it if needed.
+
+        Only libraries without a trigram title engine need it.
+        """
+        if self._regex_index is None:
+            self._regex_index = TrigramIndex()
+            for video in self.iter_videos():
+                self._regex_index.add(video.video_id, video.title.lower())
+        return self._regex_index
+
+    def _title_matches(self, search_term):
+        """Returns the videos whose title contains search_term, unordered."""
+        self._build_deferred_engines()
+        if self._title_engine is None:
+            return self.search_titles(search_term)
+        return self._title_engine.search(search_term)
+
+    def _tag_matches(self, video_tag):
+        """Returns the videos with a tag containing video_tag, unordered."""
+        self._build_deferred_engines()
+        if self._tag_index is None:
+            return self.search_tags(video_tag)
+        return self._tag_index.search(video_tag)
+
+    def query(self, expression):
+        """Returns the unflagged videos matching a boolean query.
+
+        The query combines title terms and #tags with AND, OR, NOT and
+        parentheses; adjacent operands are joined by AND. Each operand
+        matches like search_titles or search_tags.
+
+        Args:
+            expression: The query, e.g. "cat AND #animal NOT #dog".
+
+        Returns:
+            The matching videos ordered by title.
+
+        Raises:
+            QueryException: The query is not well formed.
+        """
+        planner = QueryPlanner(
+            lambda term: [video.video_id
+                          for video in self._title_matches(term)],
+            lambda tag: [video.video_id for video in self._tag_matches(tag)],
+            lambda: {video.video_id for video in self.iter_videos()})
+        return self._query_videos(planner.evaluate(parse(expression)))
+
+    def _query_videos(self, video_ids):
+        """Returns the unflagged videos among video_ids in title order."""
+        self._build_deferred_engines()
+        if self._title_engine is None:
+            return [video for video in self.iter_videos_by_title()
+                    if video.video_id in video_ids and not video.flagged[0]]
+        # The flag bitmap is only probed for the videos that matched.
+        videos = [self._videos[video_id] for video_id in video_ids]
+        keep = set(self._flags.unflagged(video.row for video in videos))
+        return self._in_title_order(
+            [video for video in videos if video.row in keep])
+
+    def search_titles_page(self, search_term, limit, cursor=None):
+        """Returns one page of the unflagged videos matching search_term.
+
+        Only the first limit matches in title order are selected, without
+        sorting the rest. Ties between equal titles are broken by
+        video_id.
+
+        Args:
+            search_term: The query to be used in search.
+            limit: The maximum number of videos on the page.
+            cursor: The cursor returned with the previous page, if any.
+
+        Returns:
+            The videos of the page and the cursor of the next page, or None
+            when this is the last page.
+
+        Raises:
+            ValueError: The cursor is not one returned by a search.
+        """
+        return _page(self._title_matches(search_term), limit, cursor)
+
+    def search_tags_page(self, video_tag, limit, cursor=None):
+        """Returns one page of the unflagged videos matching video_tag.
+
+        See search_titles_page for the arguments and the result.
+        """
+        return _page(self._tag_matches(video_tag), limit, cursor)
+
+    def set_flag(self, video_id, flagged):
+        """Stores the [is_flagged, reason] state of a video.
+
+        Args:
+            video_id: The video url.
+            flagged: The new [is_flagged, reason] pair.
+        """
+        self._videos[video_id].flagged = flagged
@@ -1,9 +1,17 @@
 from hashlib import new
+from itertools import islice
 import random
+import time
 
 """A video player class."""
 
-from .video_library import VideoLibrary
+from .catalog_snapshot import SnapshotException
+from .parallel_search import ParallelSearcher
+from .query import QueryException
+from .result_cache import ResultCache
+from .video_library import DuplicateVideoException
+from .video_library import PartialResults, VideoLibrary
+from .video_library import deadline_after
 from .video_playlist import Playlist
 
 random.seed(23)
@@ -12,28 +20,98 @@ random.seed(23)
 class VideoPlayer:
     """A class used to represent a Video Player."""
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
+    def __init__(self, video_library=None, cache_entries=256,
+                 cache_bytes=1 << 20, stream_results=False,
+                 search_workers=1, prompt=True, search_budget=None,
+                 max_results=None):
+        """The VideoPlayer class is initialized.
+
+        Args:
+            video_library: The library to play from, the bundled catalog
+                by default. Changes to it must go through the player, or
+                cached command results may go stale.
+            cache_entries: Maximum number of cached read command results.
+            cache_bytes: Maximum total size of the cached results.
+            stream_results: Print the results of unpaged title and tag
+                searches as they are found instead of all at once.
+            search_workers: Number of processes answering unpaged title
+                and tag searches. With one, the library answers them.
+            prompt: Ask which result to play after a search. Without the
+                prompt, the results can be played with play_result.
+            search_budget: Optional number of seconds an unpaged title or
+                tag search may take before its partial results are shown.
+            max_results: Optional maximum number of results shown by an
+                unpaged title or tag search.
+        """
+        if video_library is None:
+            video_library = VideoLibrary()
+        self._video_library = video_library
         self._map_id_video = dict()
         self._play_vid_tag = None
         self._paused_vid_tag = None
         self._playlist = Playlist()
+        self._cache = ResultCache(cache_entries, cache_bytes)
+        self._stream_results = stream_results
+        self._prompt = prompt
+        self._search_budget = search_budget
+        self._max_results = max_results
+        # The selectable video_ids of the last search, for play_result.
+        self._last_results = None
+        self._searcher = self._video_library
+        if search_workers > 1:
+            self._searcher = ParallelSearcher(
+                self._video_library, search_workers)
+        # Bumped whenever the catalog or a flag changes; playlists keep
+        # their own version.
+        self._catalog_version = 0
+        self._flag_version = 0
+
+    def close(self):
+        """Stops the search worker processes, if the player started any."""
+        if self._searcher is not self._video_library:
+            self._searcher.close()
+
+    def cache_stats(self):
+        """Returns the hit and miss counts of the result cache."""
+        return self._cache.stats()
+
+    def _cached(self, key, versions, render):
+        """Returns the cached (text, video_ids) of a read command.
+
+        Args:
+            key: The command and its arguments.
+            versions: The versions of the state the result depends on.
+            render: Callable computing the (text, video_ids) on a miss.
+        """
+        result = self._cache.get(key, versions)
+        if result is None:
+            result = render()
+            text, video_ids = result
+            size = len(text) + 8 * len(video_ids or ())
+            self._cache.put(key, versions, result, size)
+        return result
 
     def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos())
+        num_videos = self._video_library.count()
         print(f"{num_videos} videos in the library")
 
     def show_all_videos(self):
         """Returns all videos."""
-        print("Here's a list of all available videos:")
-        videos = self._video_library.get_all_videos()
-
-        videos.sort(key=lambda x: x.title)
-        for video in videos:
+        text, _ = self._cached(
+            ("SHOW_ALL_VIDEOS",),
+            (self._catalog_version, self._flag_version),
+            self._render_all_videos)
+        print(text, end="")
+
+    def _render_all_videos(self):
+        """Renders the output of show_all_videos."""
+        lines = ["Here's a list of all available videos:"]
+        for video in self._video_library.iter_videos_by_title():
             flag_msg = " - FLAGGED (reason: {0})".format(
                 video.flagged[1]) if video.flagged[0] else ""
-            print("{0} ({1}) [{2}]{3}".format(
+            lines.append("{0} ({1}) [{2}]{3}".format(
                 video.title, video.video_id, ' '.join(video.tags), flag_msg))
+        return "\n".join(lines) + "\n", None
 
     def play_video(self, video_id):
         """Plays the respective video.
@@ -79,16 +157,19 @@ class VideoPlayer:
     def play_random_video(self):
         """Plays a random video from the video library."""
 
-        total_playing_video = self._video_library.get_all_videos()
-        total_playing_video = [
-            video for video in total_playing_video if not video.flagged[0]]
-
-        if len(total_playing_video) == 0:
+        total_len = (self._video_library.count()
+                     - self._video_library.count_flagged())
+        if total_len == 0:
             print("No videos available")
             return
 
-        total_len = len(total_playing_video)
-        new_video = total_playing_video[int(random.random()) % total_len]
+        # Walk to the chosen unflagged video instead of copying the
+        # catalog into a list first.
+        index = int(random.random()) % total_len
+        new_video = next(islice(
+            (video for video in self._video_library.iter_videos()
+             if not video.flagged[0]),
+            index, None))
 
         if new_video.flagged[0]:
             print("Cannot play video: Video is currently flagged (reason: {0})".format(
@@ -198,16 +279,23 @@ class VideoPlayer:
     def show_all_playlists(self):
         """Display all playlists."""
 
+        text, _ = self._cached(
+            ("SHOW_ALL_PLAYLISTS",), (self._playlist.version,),
+            self._render_all_playlists)
+        print(text, end="")
+
+    def _render_all_playlists(self):
+        """Renders the output of show_all_playlists."""
         all_playlist, name_map = self._playlist.show_all_playlist()
         if len(name_map.keys()) == 0:
-            print("No playlists exist yet")
-            return
+            return "No playlists exist yet\n", None
 
         names = list(name_map.keys())
         names.sort()
-        print("Showing all playlists:")
+        lines = ["Showing all playlists:"]
         for name in names:
-            print(name_map[name])
+            lines.append(name_map[name])
+        return "\n".join(lines) + "\n", None
 
     def show_playlist(self, playlist_name):
         """Display all videos in a playlist with a given name.
@@ -228,6 +316,9 @@ class VideoPlayer:
 
         for video_id in all_videos:
             video = self._video_library.get_video(video_id)
+            if video is None:
+                # Removed from the catalog by a reload.
+                continue
             flag_msg = " - FLAGGED (reason: {0})".format(
                 video.flagged[1]) if video.flagged[0] else ""
             print("{0} ({1}) [{2}]{3}".format(
@@ -263,69 +354,267 @@ class VideoPlayer:
         msg = self._playlist.delete_playlist(playlist_name)
         print(msg)
 
-    def search_videos(self, search_term):
+    def _bounded(self, search, search_within):
+        """Returns search, or search_within when the search is bounded.
+
+        Bounded searches go to the library, whose indexes let them stop
+        early; the search workers always finish their scans.
+
+        Args:
+            search: Callable returning the title ordered results of a
+                term.
+            search_within: The library's bounded variant of search.
+        """
+        if self._search_budget is None and self._max_results is None:
+            return search
+
+        def bounded_search(term):
+            return search_within(term, self._search_budget, self._max_results)
+        return bounded_search
+
+    def search_videos(self, search_term, limit=None, cursor=None):
         """Display all the videos whose titles contain the search_term.
 
         Args:
             search_term: The query to be used in search.
+            limit: Optional number of results per page.
+            cursor: The cursor printed with the previous page, if any.
         """
-        results = []
-        for video in self._video_library.get_all_videos():
-            if video.title.lower().find(search_term.lower()) != -1:
-                results.append(video)
+        self._search(
+            "SEARCH_VIDEOS", search_term, limit, cursor,
+            self._bounded(self._searcher.search_titles,
+                          self._video_library.search_titles_within),
+            self._video_library.search_titles_page,
+            self._video_library.iter_search_titles)
+
+    def search_videos_tag(self, video_tag, limit=None, cursor=None):
+        """Display all videos whose tags contains the provided tag.
 
-        if len(results) == 0:
-            print("No search results for {0}".format(search_term))
+        Args:
+            video_tag: The video tag to be used in search.
+            limit: Optional number of results per page.
+            cursor: The cursor printed with the previous page, if any.
+        """
+        self._search(
+            "SEARCH_VIDEOS_WITH_TAG", video_tag, limit, cursor,
+            self._bounded(self._searcher.search_tags,
+                          self._video_library.search_tags_within),
+            self._video_library.search_tags_page,
+            self._video_library.iter_search_tags)
+
+    def search_videos_fuzzy(self, search_term, max_edits=1):
+        """Display all the videos whose titles nearly contain the search_term.
+
+        Args:
+            search_term: The query to be used in search.
+            max_edits: The typos tolerated in every word of search_term.
+        """
+        self._search(
+            ("SEARCH_VIDEOS_FUZZY", max_edits), search_term, None, None,
+            lambda term: self._video_library.search_titles_fuzzy(
+                term, max_edits),
+            None)
+
+    def search_videos_regex(self, pattern):
+        """Display all the videos whose titles match a regular expression.
+
+        Args:
+            pattern: The regular expression, searched anywhere in titles.
+        """
+        self._search("SEARCH_REGEX", pattern, None, None,
+                     self._video_library.search_titles_regex, None)
+
+    def query_videos(self, expression):
+        """Display all the unflagged videos matching a boolean query.
+
+        Args:
+            expression: Title terms and #tags combined with AND, OR, NOT
+                and parentheses.
+        """
+        self._search("QUERY", expression, None, None,
+                     self._video_library.query, None)
+
+    def find_videos(self, search_term, limit=None, cursor=None):
+        """Returns the unflagged videos whose titles contain the search_term.
+
+        Nothing is printed and no input is read. The videos are ordered
+        like the output of search_videos and become the results played by
+        play_result.
+
+        Args:
+            search_term: The query to be used in search.
+            limit: Optional number of results per page.
+            cursor: The cursor printed with the previous page, if any.
+
+        Returns:
+            The list of Video objects, empty when nothing matches or the
+            cursor is invalid.
+        """
+        return self._find(
+            "SEARCH_VIDEOS", search_term, limit, cursor,
+            self._bounded(self._searcher.search_titles,
+                          self._video_library.search_titles_within),
+            self._video_library.search_titles_page)
+
+    def find_videos_tag(self, video_tag, limit=None, cursor=None):
+        """Returns the unflagged videos whose tags contain the video_tag.
+
+        See find_videos for the arguments and the result.
+        """
+        return self._find(
+            "SEARCH_VIDEOS_WITH_TAG", video_tag, limit, cursor,
+            self._bounded(self._searcher.search_tags,
+                          self._video_library.search_tags_within),
+            self._video_library.search_tags_page)
+
+    def _find(self, command, search_term, limit, cursor, search,
+              search_page):
+        """Returns search results as Video objects without any output."""
+        _, video_ids = self._search_results(
+            command, search_term, limit, cursor, search, search_page)
+        self._last_results = video_ids or []
+        return [self._video_library.get_video(video_id)
+                for video_id in self._last_results]
+
+    def _search_results(self, command, search_term, limit, cursor, search,
+                        search_page):
+        """Returns the cached (text, video_ids) of a search."""
+        if self._search_budget is not None and limit is None \
+                and cursor is None:
+            # A result cut short by the clock must not be served again.
+            return self._render_search(
+                search_term, limit, cursor, search, search_page)
+        return self._cached(
+            (command, search_term, limit, cursor),
+            (self._catalog_version, self._flag_version),
+            lambda: self._render_search(
+                search_term, limit, cursor, search, search_page))
+
+    def play_result(self, result_number):
+        """Plays a video from the results of the last search.
+
+        Args:
+            result_number: The number the video was listed with, from 1.
+        """
+        if not self._last_results:
+            print("Cannot play result: No search results to play from")
+            return
+        if not 1 <= result_number <= len(self._last_results):
+            print("Cannot play result: Invalid result number")
+            return
+        self.play_video(self._last_results[result_number - 1])
+
+    def _search(self, command, search_term, limit, cursor, search,
+                search_page, stream=None):
+        """Displays search results and offers to play one of them.
+
+        Args:
+            command: The search command and its options, used for caching.
+            search_term: The query to be used in search.
+            limit: Optional number of results per page.
+            cursor: The cursor printed with the previous page, if any.
+            search: The library method returning all results.
+            search_page: The library method returning a page of results.
+            stream: The library method yielding results as they are found,
+                used in streaming mode.
+        """
+        if (self._stream_results and stream is not None
+                and limit is None and cursor is None):
+            video_ids = self._stream_search(search_term, stream)
+        else:
+            text, video_ids = self._search_results(
+                command, search_term, limit, cursor, search, search_page)
+            print(text, end="")
+        self._last_results = video_ids or []
+        if video_ids is None or not self._prompt:
             return
 
-        results.sort(key=lambda x: x.title)
-        results = [video for video in results if not video.flagged[0]]
-        print("Here are the results for {0}:".format(search_term))
-        for i, video in enumerate(results):
-            print("{0}) {1} ({2}) [{3}]".format(
-                i+1, video.title, video.video_id, ' '.join(video.tags)))
         print("Would you like to play any of the above? If yes, specify the number of the video.")
         print("If your answer is not a valid number, we will assume it's a no.")
-
         seq = input()
         try:
             seq_num = int(seq)
-            self.play_video(results[seq_num-1].video_id)
+            self.play_video(video_ids[seq_num-1])
         except Exception:
             return
 
-    def search_videos_tag(self, video_tag):
-        """Display all videos whose tags contains the provided tag.
+    def _stream_search(self, search_term, stream):
+        """Prints search results as they are found, like _render_search.
 
-        Args:
-            video_tag: The video tag to be used in search.
+        The search budget and the maximum number of results apply as
+        well.
+
+        Returns:
+            The selectable video_ids, None when nothing matched.
         """
-        results = []
-        for video in self._video_library.get_all_videos():
-            for tag in video.tags:
-                if tag.lower().find(video_tag.lower()) != -1:
-                    results.append(video)
+        deadline = deadline_after(self._search_budget)
+        video_ids = None
+        truncated = False
+        for video in stream(search_term, deadline):
+            if video_ids is None:
+                video_ids = []
+                print("Here are the results for {0}:".format(search_term))
+            if video.flagged[0]:
+                continue
+            if (self._max_results is not None
+                    and len(video_ids) >= self._max_results):
+                truncated = True
+                break
+            video_ids.append(video.video_id)
+            print("{0}) {1} ({2}) [{3}]".format(
+                len(video_ids), video.title, video.video_id,
+                ' '.join(video.tags)), flush=True)
+        if deadline is not None and time.monotonic() >= deadline:
+            truncated = True
+
+        if video_ids is None:
+            print("No search results for {0}".format(search_term))
+        if truncated:
+            print("Search stopped early, more results may exist")
+        return video_ids
+
+    def _render_search(self, search_term, limit, cursor, search, search_page):
+        """Renders search results and the list of selectable video_ids.
 
+        The video_ids are None when there is nothing to choose from.
+        """
+        next_cursor = None
+        partial = None
+        if limit is None and cursor is None:
+            try:
+                results = search(search_term)
+            except QueryException as e:
+                return "Cannot search: {0}\n".format(e), None
+            if isinstance(results, PartialResults):
+                partial, results = results, results.videos
+        else:
+            try:
+                results, next_cursor = search_page(
+                    search_term, limit or self._video_library.count() or 1,
+                    cursor)
+            except ValueError:
+                return "Cannot search: Invalid cursor {0}\n".format(
+                    cursor), None
+
+        truncated = ""
+        if partial is not None and partial.truncated:
+            truncated = ("Search stopped after {0} of {1} videos, "
+                         "more results may exist\n").format(
+                             partial.scanned, partial.total)
         if len(results) == 0:
-            print("No search results for {0}".format(video_tag))
-            return
+            return "No search results for {0}\n{1}".format(
+                search_term, truncated), None
 
-        results.sort(key=lambda x: x.title)
         results = [video for video in results if not video.flagged[0]]
-
-        print("Here are the results for {0}:".format(video_tag))
+        lines = ["Here are the results for {0}:".format(search_term)]
         for i, video in enumerate(results):
-            print("{0}) {1} ({2}) [{3}]".format(
+            lines.append("{0}) {1} ({2}) [{3}]".format(
                 i+1, video.title, video.video_id, ' '.join(video.tags)))
-        print("Would you like to play any of the above? If yes, specify the number of the video.")
-        print("If your answer is not a valid number, we will assume it's a no.")
-
-        seq = input()
-        try:
-            seq_num = int(seq)
-            self.play_video(results[seq_num-1].video_id)
-        except Exception:
-            return
+        if next_cursor is not None:
+            lines.append("More results are available with cursor: {0}".format(
+                next_cursor))
+        return ("\n".join(lines) + "\n" + truncated,
+                [video.video_id for video in results])
 
     def flag_video(self, video_id, flag_reason=""):
         """Mark a video as flagged.
@@ -344,7 +633,8 @@ class VideoPlayer:
             return
 
         flag_reason = "Not supplied" if flag_reason == "" else flag_reason
-        video.flagged = [True, flag_reason]
+        self._video_library.set_flag(video_id, [True, flag_reason])
+        self._flag_version += 1
         if self._play_vid_tag == video_id or self._paused_vid_tag == video_id:
             # Manually make the paused video played, so that we
             # can stop it.
@@ -368,5 +658,30 @@ class VideoPlayer:
             print("Cannot remove flag from video: Video is not flagged")
             return
 
-        video.flagged = [False, ""]
+        self._video_library.set_flag(video_id, [False, ""])
+        self._flag_version += 1
         print("Successfully removed flag from video: {0}".format(video.title))
+
+    def reload_library(self):
+        """Picks up catalog changes without losing playlists or flags."""
+        current_id = self._play_vid_tag or self._paused_vid_tag
+        current = None
+        if current_id is not None:
+            current = self._video_library.get_video(current_id)
+
+        # A failed reload leaves the library on its previous catalog.
+        try:
+            delta = self._video_library.reload()
+        except (SnapshotException, DuplicateVideoException, ValueError,
+                OSError) as e:
+            print("Cannot reload library: {0}".format(e))
+            return
+        if delta.added or delta.changed or delta.removed:
+            self._catalog_version += 1
+        if current is not None and current_id in delta.removed:
+            print("Stopping video: {0}".format(current.title))
+            self._play_vid_tag = None
+            self._paused_vid_tag = None
+
+        print("Reloaded library: {0} added, {1} changed, {2} removed".format(
+            len(delta.added), len(delta.changed), len(delta.removed)))
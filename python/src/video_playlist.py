@@ -15,6 +15,8 @@ class Playlist:
     def __init__(self) -> None:
         self.all_playlist = {}
         self.name_map = {}
+        # Bumped on every change, so cached listings can tell they are stale.
+        self.version = 0
 
     def create_playlist(self, playlist_name) -> str:
         """Add a new playlist."""
@@ -23,6 +25,7 @@ class Playlist:
 
         self.all_playlist[playlist_name.lower()] = list()
         self.name_map[playlist_name.lower()] = playlist_name
+        self.version += 1
         return "Successfully created new playlist: {0}".format(playlist_name)
 
     def add_to_playlist(self, playlist_name, video_id) -> str:
@@ -34,6 +37,7 @@ class Playlist:
             return "Cannot add video to {0}: Video already added".format(playlist_name)
 
         self.all_playlist[playlist_name.lower()].append(video_id)
+        self.version += 1
         return None
 
     def show_all_playlist(self):
@@ -62,6 +66,7 @@ class Playlist:
         # Video is present
 
         self.all_playlist[playlist_name.lower()].remove(video_id)
+        self.version += 1
         return "Removed video from {0}: {1}".format(playlist_name, video_details.title)
 
     def clear_playlist(self, playlist_name):
@@ -70,6 +75,7 @@ class Playlist:
             return "Cannot clear playlist {0}: Playlist does not exist".format(playlist_name)
 
         self.all_playlist[playlist_name.lower()] = list()
+        self.version += 1
         return "Successfully removed all videos from {0}".format(playlist_name)
 
     def delete_playlist(self, playlist_name):
@@ -78,4 +84,5 @@ class Playlist:
             return "Cannot delete playlist {0}: Playlist does not exist".format(playlist_name)
 
         self.all_playlist.pop(playlist_name.lower())
+        self.version += 1
         return "Deleted playlist: {0}".format(playlist_name)
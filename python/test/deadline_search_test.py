@@ -0,0 +1,123 @@
+from itertools import count
+from unittest import mock
+
+import pytest
+
+from src import video_library
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _ids(videos):
+    return [video.video_id for video in videos]
+
+
+def test_search_within_without_limits_is_complete():
+    library = VideoLibrary()
+    library.set_flag("funny_dogs_video_id", [True, ""])
+    result = library.search_titles_within("o")
+    assert _ids(result.videos) == [
+        video.video_id for video in library.search_titles("o")
+        if not video.flagged[0]]
+    assert (result.truncated, result.scanned, result.total) == (False, 5, 5)
+    assert _ids(library.search_tags_within("#CAT").videos) == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+
+
+def test_search_within_stops_at_max_results():
+    library = VideoLibrary()
+    result = library.search_titles_within("o", max_results=2)
+    assert _ids(result.videos) == [
+        "another_cat_video_id", "funny_dogs_video_id"]
+    # The walk stopped at the third video in title order.
+    assert (result.truncated, result.scanned, result.total) == (True, 3, 5)
+
+    result = library.search_titles_within("nothing", max_results=1)
+    assert result.truncated is False
+
+
+def test_search_within_stops_at_deadline(monkeypatch):
+    library = VideoLibrary()
+    # The clock is first read after DEADLINE_CHECK_INTERVAL videos.
+    assert len(library.search_titles_within("", 0).videos) == 5
+
+    # Every look at the clock takes one second.
+    clock = count()
+    monkeypatch.setattr(video_library, "DEADLINE_CHECK_INTERVAL", 1)
+    monkeypatch.setattr(video_library.time, "monotonic",
+                        lambda: next(clock))
+    result = library.search_tags_within("#animal", 1.5)
+    assert _ids(result.videos) == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    assert (result.truncated, result.scanned, result.total) == (True, 2, 5)
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_search_videos_with_max_results(capfd):
+    player = VideoPlayer(max_results=1)
+    player.search_videos("cat")
+    player.search_videos("zz")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 6
+    assert "Here are the results for cat:" in lines[0]
+    assert "1) Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[1]
+    assert ("Search stopped after 1 of 5 videos, "
+            "more results may exist") in lines[2]
+    assert "No search results for zz" in lines[5]
+
+
+def test_bounded_search_uses_the_indexes():
+    library = VideoLibrary()
+    player = VideoPlayer(library, max_results=1)
+    with mock.patch.object(library._title_engine, "candidates",
+                           wraps=library._title_engine.candidates) as lookup:
+        assert _ids(player.find_videos("cat")) == ["amazing_cats_video_id"]
+    lookup.assert_called_once_with("cat")
+
+
+@pytest.mark.parametrize("engine", ["trigram", "suffix_array", "scan"])
+def test_bounded_search_visits_few_candidates_in_order(tmp_path, engine):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("".join(
+        "Video {0:02} {1} | id_{0} | #{2}\n".format(
+            number, "needle" if number in (30, 7) else "hay",
+            "rare" if number in (30, 7) else "common")
+        for number in range(40)))
+    library = VideoLibrary(catalog, title_search=engine)
+
+    result = library.search_titles_within("NEEDLE", max_results=1)
+    assert _ids(result.videos) == ["id_7"]
+    # The catalog is covered up to the next candidate, Video 30.
+    expected = (True, 30, 40) if engine != "scan" else (True, 8, 40)
+    assert (result.truncated, result.scanned, result.total) == expected
+
+    result = library.search_tags_within("#rare", max_results=2)
+    assert _ids(result.videos) == ["id_7", "id_30"]
+    assert (result.truncated, result.scanned, result.total) == (
+        False, 40, 40)
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_streamed_search_with_max_results(capfd):
+    player = VideoPlayer(stream_results=True, max_results=1)
+    player.search_videos("o")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 5
+    assert "Here are the results for o:" in lines[0]
+    assert "1) Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[1]
+    assert "Search stopped early, more results may exist" in lines[2]
+
+
+def test_streamed_search_stops_at_deadline(monkeypatch):
+    library = VideoLibrary()
+    clock = count()
+    monkeypatch.setattr(video_library, "DEADLINE_CHECK_INTERVAL", 1)
+    monkeypatch.setattr(video_library.time, "monotonic",
+                        lambda: next(clock))
+    # The clock reads 0, 1 then 2 before the second, third and fourth
+    # videos.
+    assert _ids(library.iter_search_titles("", 1.5)) == [
+        "amazing_cats_video_id", "another_cat_video_id",
+        "funny_dogs_video_id"]
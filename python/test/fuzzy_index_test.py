@@ -0,0 +1,88 @@
+from itertools import product
+from unittest import mock
+
+import pytest
+
+from src.fuzzy_index import FuzzyIndex, edit_distance, words
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def test_edit_distance_is_capped():
+    strings = ["", "a", "ab", "ba", "abc", "acb", "cats", "cast", "dogs"]
+    for a, b in product(strings, repeat=2):
+        for max_edits in range(3):
+            assert edit_distance(a, b, max_edits) == min(
+                _levenshtein(a, b), max_edits + 1)
+
+
+def test_fuzzy_index_matches_edit_distance_scan():
+    titles = ["Funny Dogs", "Amazing Cats", "Another Cat Video",
+              "Life at Google", "Video about nothing"]
+    index = FuzzyIndex()
+    for key, title in enumerate(titles):
+        index.add(key, title)
+
+    for term in ["dgs", "amazng", "cta", "vdeo", "googel", "nothing",
+                 "xyz", "a"]:
+        for max_edits in range(3):
+            expected = {key for key, title in enumerate(titles)
+                        if any(_levenshtein(term, word) <= max_edits
+                               for word in words(title))}
+            assert index.search(term, max_edits) == expected
+
+
+def test_fuzzy_index_remove():
+    index = FuzzyIndex()
+    index.add("a", "Funny Dogs")
+    index.add("b", "Funny Cats")
+    index.remove("a", "Funny Dogs")
+    assert index.search("funy", 1) == {"b"}
+    assert index.search("dogs", 1) == set()
+    assert len(index) == 2
+
+    with pytest.raises(ValueError):
+        index.search("funy", 3)
+
+
+def test_search_titles_fuzzy_follows_reloads(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("Funny Dogs | dogs | #dog\n"
+                       "Amazing Cats | cats | #cat\n")
+    library = VideoLibrary(catalog)
+    # Loading does not pay for the index, the first fuzzy search does.
+    assert library._fuzzy_index is None
+    assert [video.title for video in
+            library.search_titles_fuzzy("Amazng cts")] == ["Amazing Cats"]
+
+    catalog.write_text("Funny Dogs | dogs | #dog\n"
+                       "Amazing Bats | cats | #cat\n")
+    library.reload()
+    assert library.search_titles_fuzzy("Amazng cts") == []
+    assert [video.title for video in
+            library.search_titles_fuzzy("Amazng cts", 2)] == ["Amazing Bats"]
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_search_videos_fuzzy(capfd):
+    player = VideoPlayer()
+    player.search_videos_fuzzy("vdeo")
+    player.search_videos_fuzzy("vdeo", 0)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 6
+    assert "Here are the results for vdeo:" in lines[0]
+    assert "1) Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[1]
+    assert "2) Video about nothing (nothing_video_id) []" in lines[2]
+    assert "No search results for vdeo" in lines[5]
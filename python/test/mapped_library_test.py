@@ -0,0 +1,133 @@
+from unittest import mock
+import os
+
+import pytest
+
+from src.mapped_library import MappedVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+@pytest.fixture
+def mapped_library(tmp_path):
+    snapshot = tmp_path / "catalog.snap"
+    VideoLibrary().save_snapshot(snapshot)
+    library = MappedVideoLibrary(snapshot)
+    yield library
+    library.close()
+
+
+def test_mapped_library_has_all_videos(mapped_library):
+    assert len(mapped_library.get_all_videos()) == 5
+
+
+def test_mapped_library_decodes_video(mapped_library):
+    video = mapped_library.get_video("amazing_cats_video_id")
+
+    assert video.title == "Amazing Cats"
+    assert video.video_id == "amazing_cats_video_id"
+    assert video.tags == ("#cat", "#animal")
+    assert mapped_library.get_video("nothing_video_id").tags == ()
+    assert mapped_library.get_video("some_other_video_id") is None
+
+
+def test_mapped_library_keeps_flags(mapped_library, capfd):
+    player = VideoPlayer(mapped_library)
+    player.flag_video("amazing_cats_video_id", "dont_like_cats")
+    player.play_video("amazing_cats_video_id")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 2
+    assert ("Cannot play video: Video is currently flagged "
+            "(reason: dont_like_cats)") in lines[1]
+
+
+def test_mapped_library_counts_without_decoding(mapped_library):
+    assert mapped_library.count() == 5
+    assert len(mapped_library.view_all_videos()) == 5
+    assert [video.video_id for video in mapped_library.view_all_videos()] == [
+        video.video_id for video in VideoLibrary().iter_videos()]
+
+
+def test_mapped_library_searches_titles(mapped_library, capfd):
+    assert [video.video_id for video in
+            mapped_library.search_titles("CAT")] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    page, cursor = mapped_library.search_titles_page("o", 2)
+    assert [video.title for video in page] == [
+        "Another Cat Video", "Funny Dogs"]
+    assert [video.title for video in mapped_library.query("cat NOT amazing")] \
+        == ["Another Cat Video"]
+    with mock.patch('builtins.input', lambda *args: 'No'):
+        VideoPlayer(mapped_library).search_videos("cat")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "Here are the results for cat:" in lines[0]
+    assert "1) Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[1]
+    assert "2) Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[2]
+
+
+def test_mapped_library_searches_tags(mapped_library, capfd):
+    assert [video.video_id for video in
+            mapped_library.search_tags("#ANIMAL")] == [
+        "amazing_cats_video_id", "another_cat_video_id", "funny_dogs_video_id"]
+    with mock.patch('builtins.input', lambda *args: 'No'):
+        VideoPlayer(mapped_library).search_videos_tag("#dog")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert "Here are the results for #dog:" in lines[0]
+    assert "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[1]
+
+
+def test_mapped_library_reload(tmp_path, capfd):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("Funny Dogs | dogs | #dog\n")
+    snapshot = tmp_path / "catalog.snap"
+    VideoLibrary(catalog).save_snapshot(snapshot)
+    library = MappedVideoLibrary(snapshot, catalog)
+    player = VideoPlayer(library)
+    try:
+        player.reload_library()
+        with open(catalog, "a") as catalog_file:
+            catalog_file.write("Amazing Cats | cats | #cat\n")
+        player.reload_library()
+    finally:
+        library.close()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 2
+    assert "Reloaded library: 0 added, 0 changed, 0 removed" in lines[0]
+    assert "Cannot reload library: Catalog" in lines[1]
+    assert "changed since the snapshot was saved" in lines[1]
+
+
+def test_mapped_library_accepts_touched_catalog(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("Funny Dogs | dogs | #dog\n")
+    snapshot = tmp_path / "catalog.snap"
+    VideoLibrary(catalog).save_snapshot(snapshot)
+    stat = os.stat(catalog)
+    os.utime(catalog, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    library = MappedVideoLibrary(snapshot, catalog)
+    try:
+        assert library.reload() == ([], [], [])
+    finally:
+        library.close()
+
+
+def test_mapped_library_lists_by_title_index(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text(
+        "Same | b_id | #two\n"
+        "Alpha | c_id | #one\n"
+        "Same | a_id | #one\n")
+    snapshot = tmp_path / "catalog.snap"
+    VideoLibrary(catalog).save_snapshot(snapshot)
+    library = MappedVideoLibrary(snapshot, catalog)
+    try:
+        with mock.patch("src.mapped_library.sorted", create=True,
+                        side_effect=AssertionError("sorted")):
+            assert [video.video_id for video in
+                    library.iter_videos_by_title()] == ["c_id", "b_id", "a_id"]
+    finally:
+        library.close()
@@ -0,0 +1,72 @@
+from unittest import mock
+
+import pytest
+
+from src.parallel_search import ParallelSearcher
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _ids(videos):
+    return [video.video_id for video in videos]
+
+
+@pytest.fixture
+def searcher():
+    searcher = ParallelSearcher(VideoLibrary(), workers=2)
+    yield searcher
+    searcher.close()
+
+
+def test_parallel_search_matches_library(searcher):
+    library = searcher._library
+    library.set_flag("amazing_cats_video_id", [True, "dont_like_cats"])
+    for term in ["", "cat", "O", "zz", "video"]:
+        assert (_ids(searcher.search_titles(term))
+                == _ids(library.search_titles(term)))
+        assert (_ids(searcher.search_tags("#" + term))
+                == _ids(library.search_tags("#" + term)))
+    assert searcher.search_titles("cat")[0].flagged == [
+        True, "dont_like_cats"]
+
+
+def test_parallel_search_follows_reloads(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("Funny Dogs | dogs | #dog\n")
+    library = VideoLibrary(catalog)
+    searcher = ParallelSearcher(library, workers=2)
+    try:
+        assert _ids(searcher.search_titles("cat")) == []
+        with open(catalog, "a") as catalog_file:
+            catalog_file.write("Amazing Cats | cats | #cat\n")
+        library.reload()
+        assert _ids(searcher.search_titles("cat")) == ["cats"]
+    finally:
+        searcher.close()
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_parallel_player_output_is_identical(capfd):
+    outputs = []
+    for search_workers in (1, 2):
+        player = VideoPlayer(search_workers=search_workers)
+        try:
+            player.flag_video("amazing_cats_video_id", "dont_like_cats")
+            player.search_videos("cat")
+            player.search_videos_tag("#animal")
+            player.search_videos("zz")
+        finally:
+            player.close()
+        outputs.append(capfd.readouterr().out)
+    assert outputs[0] == outputs[1]
+
+
+def test_player_close_stops_the_workers():
+    player = VideoPlayer(search_workers=2)
+    player.find_videos("cat")
+    searcher = player._searcher
+    assert searcher._executor is not None
+    player.close()
+    assert searcher._executor is None
+    # A player searching the library itself has nothing to stop.
+    VideoPlayer().close()
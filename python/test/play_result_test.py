@@ -0,0 +1,44 @@
+from unittest import mock
+
+from src.video_player import VideoPlayer
+
+
+def _fail_on_input(*args):
+    raise AssertionError("input() must not be called")
+
+
+@mock.patch('builtins.input', _fail_on_input)
+def test_find_videos_does_not_print_or_prompt(capfd):
+    player = VideoPlayer()
+    player.flag_video("amazing_cats_video_id")
+    capfd.readouterr()
+
+    videos = player.find_videos("cat")
+    assert [video.video_id for video in videos] == ["another_cat_video_id"]
+    assert [video.video_id for video in player.find_videos_tag("#dog")] == [
+        "funny_dogs_video_id"]
+    assert player.find_videos("zz") == []
+    assert player.find_videos("cat", 1, "bad cursor") == []
+    out, err = capfd.readouterr()
+    assert out == ""
+
+
+@mock.patch('builtins.input', _fail_on_input)
+def test_play_result(capfd):
+    player = VideoPlayer(prompt=False)
+    player.play_result(1)
+    player.search_videos("cat")
+    player.play_result(3)
+    player.play_result(2)
+    player.find_videos_tag("#dog")
+    player.play_result(1)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 8
+    assert "Cannot play result: No search results to play from" in lines[0]
+    assert "Here are the results for cat:" in lines[1]
+    assert "2) Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[3]
+    assert "Cannot play result: Invalid result number" in lines[4]
+    assert "Playing video: Another Cat Video" in lines[5]
+    assert "Stopping video: Another Cat Video" in lines[6]
+    assert "Playing video: Funny Dogs" in lines[7]
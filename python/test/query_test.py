@@ -0,0 +1,80 @@
+from unittest import mock
+
+import pytest
+
+from src.query import QueryException, QueryPlanner, parse
+from src.sqlite_library import SqliteVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _titles(videos):
+    return [video.title for video in videos]
+
+
+def test_parse_precedence_and_implicit_and():
+    assert parse("cat AND #animal NOT #dog") == (
+        "and", [("title", "cat"), ("tag", "#animal"),
+                ("not", ("tag", "#dog"))])
+    assert parse("a b OR (c or NOT d)") == (
+        "or", [("and", [("title", "a"), ("title", "b")]),
+               ("or", [("title", "c"), ("not", ("title", "d"))])])
+
+
+@pytest.mark.parametrize("expression", [
+    "", "cat AND", "(cat", "cat)", "OR cat", "cat AND OR dog"])
+def test_parse_rejects_malformed_queries(expression):
+    with pytest.raises(QueryException):
+        parse(expression)
+
+
+def test_planner_short_circuits_empty_operands():
+    looked_up = []
+
+    def title_ids(term):
+        looked_up.append(term)
+        return {"empty": [], "a": ["x", "y"]}.get(term, ["x"])
+
+    planner = QueryPlanner(title_ids, lambda tag: [], lambda: {"x", "y"})
+    assert planner.evaluate(parse("empty AND (a OR b) NOT a")) == set()
+    assert looked_up == ["empty"]
+
+
+def test_query_combines_titles_and_tags():
+    library = VideoLibrary()
+    assert _titles(library.query("cat AND #animal NOT #dog")) == [
+        "Amazing Cats", "Another Cat Video"]
+    assert _titles(library.query("#dog OR google")) == [
+        "Funny Dogs", "Life at Google"]
+    assert _titles(library.query("NOT #animal")) == [
+        "Life at Google", "Video about nothing"]
+
+
+def test_query_skips_flagged_videos():
+    library = VideoLibrary()
+    library.set_flag("amazing_cats_video_id", [True, "dont_like_cats"])
+    assert _titles(library.query("#cat")) == ["Another Cat Video"]
+
+
+def test_sqlite_query_matches_memory_library(tmp_path):
+    library = SqliteVideoLibrary(tmp_path / "catalog.db")
+    library.set_flag("funny_dogs_video_id", [True, ""])
+    expected = VideoLibrary()
+    expected.set_flag("funny_dogs_video_id", [True, ""])
+    for expression in ("#animal", "o NOT (cat OR #google)", "NOT nothing"):
+        assert (_titles(library.query(expression))
+                == _titles(expected.query(expression)))
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_query_videos(capfd):
+    player = VideoPlayer()
+    player.query_videos("cat AND #animal NOT #dog")
+    player.query_videos("(cat")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 6
+    assert "Here are the results for cat AND #animal NOT #dog:" in lines[0]
+    assert "1) Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[1]
+    assert "2) Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[2]
+    assert "Cannot search: Missing ')' in query" in lines[5]
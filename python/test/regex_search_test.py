@@ -0,0 +1,115 @@
+import re
+from unittest import mock
+
+import pytest
+
+from src.query import QueryException
+from src.regex_trigrams import candidates, required_query
+from src.search_index import TrigramIndex
+from src.sqlite_library import SqliteVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+TITLES = ["Funny Dogs", "Amazing Cats", "Another Cat Video", "Life at Google",
+          "Video about nothing", "Funny Cats", "funny cats!", "Dogs", "",
+          "Funny Dogſ", "\u212aittens", "ΟΔΟΣ"]
+
+PATTERNS = [r"^Funny .* (Dogs|Cats)$", r"cat", r"(?i)CAT", r"[Cc]ats?",
+            r"Vid(eo)+", r"o{2}", r"a.b", r"^$", r".*", r"\w+ at \w+",
+            r"(?=Fun)Funny", r"nothing|Google", r"(ab)*", r"[^a]og",
+            r"Life|.", r"[a-z]at", r"Dog(?!s)", r"(Funny|Amazing) Cats",
+            r"(?i)dogs", r"(?i:DOG)S", r"(?i)[r-t]$", r"(?i)kit", r"(?ai)dogs",
+            r"ΟΔΟΣ", r"ΔΟΣ$", r"(?ai)ΔΟΣ", r"(?i)δοσ"]
+
+
+def test_required_query():
+    assert required_query(r"^Funny .* (Dogs|Cats)$") == (
+        "and", [("lit", "funny "),
+                ("or", [("lit", " cats"), ("lit", " dogs")])])
+    assert required_query(r"[Cc]ats?") == ("lit", "cat")
+    assert required_query(r"(ab)*c") == ("lit", "c")
+    assert required_query(r".*") is None
+    assert required_query(r"Life|.") is None
+    assert required_query(r"(?i)dogs") == (
+        "or", [("lit", "dogs"), ("lit", "dog\u017f")])
+    assert required_query(r"(?ai)dogs") == ("lit", "dogs")
+    # str.lower() turns a capital sigma ending a word into a final sigma.
+    assert required_query(r"ΔΟΣ") == (
+        "or", [("lit", "δος"), ("lit", "δοσ")])
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_prefilter_keeps_every_match(pattern):
+    index = TrigramIndex()
+    for key, title in enumerate(TITLES):
+        index.add(key, title.lower())
+    regex = re.compile(pattern)
+
+    keys = candidates(required_query(pattern, regex.flags),
+                      index.candidates)
+    if keys is None:
+        keys = set(range(len(TITLES)))
+    assert {key for key in keys if regex.search(TITLES[key])} == {
+        key for key, title in enumerate(TITLES) if regex.search(title)}
+
+
+def test_search_titles_regex(tmp_path):
+    library = VideoLibrary()
+    sqlite_library = SqliteVideoLibrary(tmp_path / "catalog.db")
+    for pattern in PATTERNS:
+        expected = [video.video_id for video in library.iter_videos_by_title()
+                    if re.search(pattern, video.title)]
+        assert [video.video_id for video in
+                library.search_titles_regex(pattern)] == expected
+        assert [video.video_id for video in
+                sqlite_library.search_titles_regex(pattern)] == expected
+
+    with pytest.raises(QueryException):
+        library.search_titles_regex("(cat")
+
+
+@pytest.mark.parametrize("engine", ["trigram", "suffix_array"])
+def test_search_titles_regex_engines(engine):
+    library = VideoLibrary(title_search=engine)
+    assert [video.video_id for video in
+            library.search_titles_regex("(?i)^a.*CATS?")] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    # The trigram engine's grams are reused instead of a second index.
+    assert (library._regex_index is None) == (engine == "trigram")
+
+
+def test_search_titles_regex_finds_final_sigma(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("ΟΔΟΣ | road | #road\nΣΟΦΙΑ | wisdom |\n")
+    library = VideoLibrary(catalog)
+
+    for pattern in ["Σ", "ΔΟΣ", "ΟΔΟΣ$"]:
+        assert ("road" in [video.video_id for video in
+                           library.search_titles_regex(pattern)]), pattern
+
+
+def test_search_titles_regex_follows_reloads(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("Funny Dogs | dogs | #dog\n")
+    library = VideoLibrary(catalog)
+    assert library.search_titles_regex("Cats$") == []
+
+    with open(catalog, "a") as catalog_file:
+        catalog_file.write("Amazing Cats | cats | #cat\n")
+    library.reload()
+    assert [video.video_id for video in
+            library.search_titles_regex("Cats$")] == ["cats"]
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_search_videos_regex(capfd):
+    player = VideoPlayer()
+    player.search_videos_regex("^A.* Cats?( |$)")
+    player.search_videos_regex("(cat")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 6
+    assert "Here are the results for ^A.* Cats?( |$):" in lines[0]
+    assert "1) Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[1]
+    assert "2) Another Cat Video (another_cat_video_id) [#cat #animal]" in lines[2]
+    assert "Cannot search: Invalid regular expression" in lines[5]
@@ -0,0 +1,194 @@
+import os
+import random
+
+import pytest
+
+from src.sharded_library import ShardedVideoLibrary
+from src.sqlite_library import SqliteVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _write(path, text):
+    path.write_text(text)
+    # Make sure the change is visible even on coarse mtime filesystems.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+
+def test_reload_appended_rows(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("First | first_id | #one\n")
+    library = VideoLibrary(catalog)
+    first = library.get_video("first_id")
+
+    _write(catalog, "First | first_id | #one\nSecond | second_id | #two\n")
+    delta = library.reload()
+
+    assert delta.added == ["second_id"]
+    assert delta.changed == [] and delta.removed == []
+    assert library.get_video("first_id") is first
+    assert library.get_video("second_id").tags == ("#two",)
+
+
+def test_reload_changed_and_removed_rows_keep_flags(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("First | first_id | #one\nSecond | second_id |\n")
+    library = VideoLibrary(catalog)
+    library.set_flag("first_id", [True, "spam"])
+
+    _write(catalog, "First edited | first_id | #one\n")
+    delta = library.reload()
+
+    assert delta == ([], ["first_id"], ["second_id"])
+    assert library.get_video("first_id").title == "First edited"
+    assert library.get_video("first_id").flagged == [True, "spam"]
+    assert library.get_video("second_id") is None
+
+
+def test_reload_library_keeps_playlists(tmp_path, capfd):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("First | first_id | #one\n")
+    player = VideoPlayer(VideoLibrary(catalog))
+    player.create_playlist("my_playlist")
+    player.add_to_playlist("my_playlist", "first_id")
+
+    _write(catalog, "First | first_id | #one\nSecond | second_id |\n")
+    player.reload_library()
+    player.add_to_playlist("my_playlist", "second_id")
+    player.show_playlist("my_playlist")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert "Reloaded library: 1 added, 0 changed, 0 removed" in lines[2]
+    assert "Added video to my_playlist: Second" in lines[3]
+    assert "First (first_id) [#one]" in lines[5]
+    assert "Second (second_id) []" in lines[6]
+
+
+def test_reload_keeps_title_order(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("Charlie | c_id |\nAlpha | a_id |\nDelta | d_id |\n")
+    library = VideoLibrary(catalog)
+
+    _write(catalog, "Charlie | c_id |\nEcho | a_id |\nBravo | b_id |\n")
+    library.reload()
+
+    assert [video.title for video in library.iter_videos_by_title()] == [
+        "Bravo", "Charlie", "Echo"]
+
+
+def _catalog_text(rng):
+    lines = []
+    for _ in range(rng.randint(0, 12)):
+        lines.append("{0} | id_{1} | #{2}\n".format(
+            rng.choice(["Same", "Other", "Else"]), rng.randint(0, 9),
+            rng.choice(["a", "b"])))
+    return "".join(lines)
+
+
+def _listing(library):
+    return ([video.video_id for video in library.iter_videos()],
+            [video.video_id for video in library.iter_videos_by_title()],
+            [video.video_id for video in library.search_titles("e")],
+            [video.video_id for video in library.search_tags("#a")])
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "sharded"])
+def test_reload_matches_fresh_load(tmp_path, backend):
+    def open_library(catalog, name):
+        if backend == "sqlite":
+            return SqliteVideoLibrary(tmp_path / name, catalog)
+        if backend == "sharded":
+            return ShardedVideoLibrary(catalog, shards=2)
+        return VideoLibrary(catalog)
+
+    rng = random.Random(11)
+    catalog = tmp_path / "catalog.txt"
+    fresh_catalog = tmp_path / "fresh.txt"
+    catalog.write_text(_catalog_text(rng))
+    library = open_library(catalog, "reloaded.db")
+    try:
+        for attempt in range(30):
+            text = _catalog_text(rng)
+            if rng.random() < 0.5:
+                # An appended tail takes the incremental path.
+                text = catalog.read_text() + text
+            _write(catalog, text)
+            library.reload()
+            fresh_catalog.write_text(text)
+            fresh = open_library(fresh_catalog, "fresh{0}.db".format(attempt))
+            try:
+                assert _listing(library) == _listing(fresh), text
+            finally:
+                if backend != "memory":
+                    fresh.close()
+    finally:
+        if backend != "memory":
+            library.close()
+
+
+def test_reload_applies_only_the_delta(tmp_path):
+    lines = ["Same | id_{0} | #tag\n".format(number) for number in range(40)]
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("".join(lines))
+    library = VideoLibrary(catalog)
+    kept = library.get_video("id_20")
+    engine = library._title_engine
+
+    # Dropping the first line shifts every position; ties must follow.
+    lines = lines[1:] + [lines[5]]
+    lines[5] = "Same | id_6 | #edited\n"
+    _write(catalog, "".join(lines))
+    delta = library.reload()
+
+    assert delta == ([], ["id_6"], ["id_0"])
+    assert library.get_video("id_20") is kept
+    assert library._title_engine is engine
+    fresh = VideoLibrary(catalog)
+    assert _listing(library) == _listing(fresh)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "sharded"])
+@pytest.mark.parametrize("broken, message", [
+    ("First | first_id | #one\nSecond | second_id\n",
+     "Malformed catalog row: Second | second_id"),
+    ("First | first_id | #one\nThird | third_id |\nAgain | first_id |\n",
+     "Duplicate video_id in catalog: first_id"),
+    (None, "No such file or directory"),
+])
+def test_failed_reload_keeps_old_catalog(tmp_path, capfd, backend, broken,
+                                         message):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("First | first_id | #one\n")
+    if backend == "sqlite":
+        library = SqliteVideoLibrary(tmp_path / "videos.db", catalog,
+                                     on_duplicate="error")
+    elif backend == "sharded":
+        library = ShardedVideoLibrary(catalog, shards=2, on_duplicate="error")
+    else:
+        library = VideoLibrary(catalog, on_duplicate="error")
+    player = VideoPlayer(library)
+    try:
+        before = _listing(library)
+        if broken is None:
+            catalog.unlink()
+        else:
+            _write(catalog, broken)
+        player.reload_library()
+        assert _listing(library) == before
+
+        _write(catalog, "First | first_id | #one\nSecond | second_id |\n")
+        player.reload_library()
+        assert [video.video_id for video in library.iter_videos()] == [
+            "first_id", "second_id"]
+    finally:
+        player.close()
+        if backend != "memory":
+            library.close()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 2
+    assert "Cannot reload library: " in lines[0]
+    assert message in lines[0]
+    assert "Reloaded library: 1 added, 0 changed, 0 removed" in lines[1]
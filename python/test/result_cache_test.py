@@ -0,0 +1,59 @@
+from unittest import mock
+
+from src.result_cache import ResultCache
+from src.video_player import VideoPlayer
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, max_bytes=100)
+    cache.put("a", (0,), "A", 1)
+    cache.put("b", (0,), "B", 1)
+    assert cache.get("a", (0,)) == "A"
+    cache.put("c", (0,), "C", 1)
+
+    assert cache.get("b", (0,)) is None
+    assert cache.get("a", (0,)) == "A"
+    assert cache.get("c", (0,)) == "C"
+    cache.put("d", (0,), "D", 99)
+    assert len(cache) == 2
+    assert cache.get("a", (0,)) is None
+
+
+def test_cache_drops_stale_versions():
+    cache = ResultCache()
+    cache.put("a", (0, 0), "A", 1)
+
+    assert cache.get("a", (0, 1)) is None
+    assert cache.get("a", (0, 0)) is None
+    assert cache.stats() == {"hits": 0, "misses": 2, "entries": 0, "bytes": 0}
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_player_caches_read_commands(capfd):
+    player = VideoPlayer()
+    player.show_all_videos()
+    player.show_all_videos()
+    player.search_videos("cat")
+    player.search_videos("cat")
+    assert player.cache_stats()["hits"] == 2
+    assert player.cache_stats()["misses"] == 2
+
+    player.flag_video("amazing_cats_video_id")
+    capfd.readouterr()
+    player.search_videos("cat")
+    out, err = capfd.readouterr()
+    assert "Amazing Cats" not in out
+    assert player.cache_stats()["misses"] == 3
+
+
+def test_player_invalidates_playlists(capfd):
+    player = VideoPlayer()
+    player.show_all_playlists()
+    player.create_playlist("my_playlist")
+    player.show_all_playlists()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines == ["No playlists exist yet",
+                     "Successfully created new playlist: my_playlist",
+                     "Showing all playlists:",
+                     "my_playlist"]
@@ -0,0 +1,183 @@
+import pytest
+
+from src import columnar, suffix_array
+from src.aho_corasick import AhoCorasick
+from src.search_index import TagIndex, TitleTrigramIndex
+from src.suffix_array import SuffixArrayTitleIndex, build_suffix_array
+from src.tag_vocabulary import TagVocabulary
+from src.video import FlagTable, Video
+from src.video_library import VideoLibrary
+
+
+def _videos(titles):
+    flags = FlagTable()
+    return [Video(title, "video_{0}".format(i), [], flags)
+            for i, title in enumerate(titles)]
+
+
+TITLES = ["Funny Dogs", "Amazing Cats", "Another Cat Video", "Life at Google",
+          "Video about nothing", "a", "ÉCOLE", ""]
+
+
+def test_trigram_index_matches_substring_scan():
+    videos = _videos(TITLES)
+    index = TitleTrigramIndex()
+    for video in videos:
+        index.add(video)
+
+    for term in ["", "a", "A", "at", "T ", "cat", "video", "o g", "école",
+                 "nothing at all", "zz", "s"]:
+        expected = {video.video_id for video in videos
+                    if video.title.lower().find(term.lower()) != -1}
+        assert {video.video_id for video in index.search(term)} == expected
+
+
+def test_trigram_index_remove():
+    videos = _videos(TITLES)
+    index = TitleTrigramIndex()
+    for video in videos:
+        index.add(video)
+    for video in videos[1:]:
+        index.remove(video)
+
+    assert [video.title for video in index.search("dog")] == ["Funny Dogs"]
+    assert index.search("cat") == []
+    assert index.search("a") == []
+    assert len(index) == 1
+
+
+def test_tag_index_unions_matching_tags():
+    flags = FlagTable()
+    vocabulary = TagVocabulary()
+    videos = [Video("Cats", "cats_id", vocabulary.encode(["#cat", "#animal"]),
+                    flags),
+              Video("Dogs", "dogs_id", vocabulary.encode(["#dog", "#animal"]),
+                    flags),
+              Video("Cars", "cars_id", vocabulary.encode(["#car"]), flags)]
+    index = TagIndex(vocabulary)
+    for video in videos:
+        index.add(video)
+
+    assert sorted(video.video_id for video in index.search("A")) == [
+        "cars_id", "cats_id", "dogs_id"]
+    assert sorted(video.video_id for video in index.search("#ca")) == [
+        "cars_id", "cats_id"]
+    index.remove(videos[0])
+    assert [video.video_id for video in index.search("#cat")] == []
+
+
+def test_suffix_array_matches_substring_scan():
+    videos = _videos(TITLES)
+    index = SuffixArrayTitleIndex()
+    for video in videos:
+        index.add(video)
+
+    for term in ["", "a", "A", "at", "T ", "cat", "video", "o g", "école",
+                 "nothing at all", "zz", "s"]:
+        expected = {video.video_id for video in videos
+                    if video.title.lower().find(term.lower()) != -1}
+        assert {video.video_id for video in index.search(term)} == expected
+
+    index.remove(videos[0])
+    assert index.search("dog") == []
+
+
+def test_suffix_array_segments_follow_changes(monkeypatch):
+    monkeypatch.setattr(suffix_array, "SEGMENT_SIZE", 2)
+    videos = _videos(TITLES)
+    index = SuffixArrayTitleIndex()
+    for video in videos:
+        index.add(video)
+    for video in videos[::2]:
+        index.remove(video)
+    index.add(videos[0])
+
+    live = [videos[0]] + videos[1::2]
+    for term in ["", "a", "cat", "video", "o g", "école", "zz"]:
+        expected = {video.video_id for video in live
+                    if video.title.lower().find(term.lower()) != -1}
+        assert {video.video_id for video in index.search(term)} == expected
+
+
+def test_suffix_array_keeps_logarithmic_segments(monkeypatch):
+    monkeypatch.setattr(suffix_array, "SEGMENT_SIZE", 2)
+    videos = _videos(["{0} {1}".format(TITLES[i % len(TITLES)], i)
+                      for i in range(200)])
+    index = SuffixArrayTitleIndex()
+    for video in videos:
+        index.add(video)
+        assert len(index._levels) <= len(index).bit_length()
+    for video in videos[::3]:
+        index.remove(video)
+
+    live = [video for i, video in enumerate(videos) if i % 3]
+    for term in ["a", "cat 1", "video", "7", "zz"]:
+        expected = {video.video_id for video in live
+                    if video.title.lower().find(term.lower()) != -1}
+        assert {video.video_id for video in index.search(term)} == expected
+
+
+def test_build_suffix_array():
+    text = "banana"
+    assert list(build_suffix_array(text)) == sorted(
+        range(len(text)), key=lambda i: text[i:])
+
+
+def test_aho_corasick_matches_substring_scan():
+    terms = ["", "a", "at", "cat", "CATS", "video", "o g", "école", "ts",
+             "nothing at all", "g"]
+    automaton = AhoCorasick(terms)
+    for title in TITLES:
+        expected = {index for index, term in enumerate(terms)
+                    if title.lower().find(term.lower()) != -1}
+        assert automaton.matches(title) == expected
+
+
+def test_search_titles_batch_matches_search_titles():
+    library = VideoLibrary()
+    terms = ["cat", "o", "CAT", "zz", "cat"]
+    results = library.search_titles_batch(terms)
+    assert list(results) == ["cat", "o", "CAT", "zz"]
+    for term, video_ids in results.items():
+        assert video_ids == [video.video_id
+                             for video in library.search_titles(term)]
+
+
+# The columnar kernels are checked with and without NumPy.
+_KERNELS = [pytest.param(False, id="python"),
+            pytest.param(True, id="numpy", marks=pytest.mark.skipif(
+                columnar.numpy is None, reason="NumPy is not installed"))]
+
+
+@pytest.mark.parametrize("vectorized", _KERNELS)
+def test_columnar_scan_matches_substring_scan(vectorized, monkeypatch):
+    if not vectorized:
+        monkeypatch.setattr(columnar, "numpy", None)
+    videos = _videos(TITLES)
+    index = columnar.ColumnarTitleScan()
+    assert index.search("a") == []
+    for video in videos:
+        index.add(video)
+
+    for term in ["", "a", "A", "at", "T ", "cat", "video", "o g", "école",
+                 "nothing at all", "zz", "s", "g", "\u00e9"]:
+        expected = {video.video_id for video in videos
+                    if video.title.lower().find(term.lower()) != -1}
+        assert {video.video_id for video in index.search(term)} == expected
+
+    index.remove(videos[0])
+    assert index.search("dog") == []
+
+
+@pytest.mark.parametrize("vectorized", _KERNELS)
+def test_flag_table_unflagged(vectorized, monkeypatch):
+    if not vectorized:
+        monkeypatch.setattr("src.video.numpy", None)
+    flags = FlagTable()
+    rows = [flags.allocate() for _ in range(20)]
+    for row in (0, 7, 8, 19):
+        flags.set(row, True, "reason")
+    assert flags.unflagged([19, 1, 8, 9, 7]) == [1, 9]
+    assert flags.unflagged([]) == []
+    assert sorted(flags.unflagged(rows)) == [
+        row for row in rows if row not in (0, 7, 8, 19)]
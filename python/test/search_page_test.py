@@ -0,0 +1,47 @@
+from unittest import mock
+
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_search_pages_follow_title_order():
+    library = VideoLibrary()
+    first, cursor = library.search_titles_page("o", 2)
+    second, last_cursor = library.search_titles_page("o", 2, cursor)
+
+    assert [video.title for video in first] == [
+        "Another Cat Video", "Funny Dogs"]
+    assert [video.title for video in second] == [
+        "Life at Google", "Video about nothing"]
+    assert last_cursor is None
+
+
+def test_search_cursor_is_stable_when_flagging():
+    library = VideoLibrary()
+    first, cursor = library.search_tags_page("#animal", 1)
+    library.set_flag("another_cat_video_id", [True, "dont_like_cats"])
+    second, cursor = library.search_tags_page("#animal", 1, cursor)
+
+    assert [video.title for video in first] == ["Amazing Cats"]
+    assert [video.title for video in second] == ["Funny Dogs"]
+    assert cursor is None
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_search_videos_with_page_size(capfd):
+    player = VideoPlayer()
+    player.search_videos("cat", 1)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 5
+    assert "Here are the results for cat:" in lines[0]
+    assert "1) Amazing Cats (amazing_cats_video_id) [#cat #animal]" in lines[1]
+    assert "More results are available with cursor: " in lines[2]
+
+    cursor = lines[2].split()[-1]
+    player.search_videos("cat", 1, cursor)
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4
+    assert ("1) Another Cat Video (another_cat_video_id) [#cat #animal]"
+            in lines[1])
@@ -0,0 +1,66 @@
+import pytest
+from unittest import mock
+
+from src.sharded_library import ShardedVideoLibrary
+from src.video_library import DuplicateVideoException, VideoLibrary
+from src.video_player import VideoPlayer
+
+
+@pytest.fixture
+def sharded_library():
+    library = ShardedVideoLibrary(shards=3)
+    yield library
+    library.close()
+
+
+def _fields(videos):
+    return [(v.title, v.video_id, tuple(v.tags), v.flagged) for v in videos]
+
+
+def test_sharded_library_matches_memory_library(sharded_library):
+    library = VideoLibrary()
+
+    assert (_fields(sharded_library.get_all_videos())
+            == _fields(library.get_all_videos()))
+    assert (_fields([sharded_library.get_video("amazing_cats_video_id")])
+            == _fields([library.get_video("amazing_cats_video_id")]))
+    assert sharded_library.get_video("some_other_video_id") is None
+    for term in ("cat", "o", "blah"):
+        assert (_fields(sharded_library.search_titles(term))
+                == _fields(library.search_titles(term)))
+    for tag in ("#cat", "#a", "#blah"):
+        assert (_fields(sharded_library.search_tags(tag))
+                == _fields(library.search_tags(tag)))
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_sharded_player_output_is_identical(sharded_library, capfd):
+    def run(player):
+        player.flag_video("amazing_cats_video_id", "dont_like_cats")
+        player.show_all_videos()
+        player.search_videos("cat")
+        player.search_videos_tag("#animal")
+        player.allow_video("amazing_cats_video_id")
+        player.play_video("amazing_cats_video_id")
+        return capfd.readouterr()[0]
+
+    assert run(VideoPlayer(sharded_library)) == run(VideoPlayer())
+
+
+def test_sharded_reload_error_leaves_shards_in_step(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text("Funny Dogs | dogs | #dog\nAmazing Cats | cats | #cat\n")
+    library = ShardedVideoLibrary(catalog, shards=3, on_duplicate="error")
+    try:
+        with open(catalog, "a") as catalog_file:
+            catalog_file.write("Funny Dogs again | dogs | #dog\n")
+        with pytest.raises(DuplicateVideoException):
+            library.reload()
+        assert library.count() == 2
+    finally:
+        library.close()
+
+
+def test_sharded_library_rejects_empty_batches():
+    with pytest.raises(ValueError, match="batch_size"):
+        ShardedVideoLibrary(batch_size=0)
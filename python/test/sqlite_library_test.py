@@ -0,0 +1,80 @@
+import os
+
+import pytest
+from unittest import mock
+
+from src.sqlite_library import SqliteVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+@pytest.fixture
+def sqlite_library(tmp_path):
+    library = SqliteVideoLibrary(tmp_path / "catalog.db")
+    yield library
+    library.close()
+
+
+def _fields(videos):
+    return [(v.title, v.video_id, tuple(v.tags), v.flagged) for v in videos]
+
+
+def test_sqlite_library_matches_memory_library(sqlite_library):
+    library = VideoLibrary()
+
+    assert (_fields(sqlite_library.get_all_videos())
+            == _fields(library.get_all_videos()))
+    assert (_fields([sqlite_library.get_video("nothing_video_id")])
+            == _fields([library.get_video("nothing_video_id")]))
+    assert sqlite_library.get_video("some_other_video_id") is None
+    for term in ("cat", "A", "blah"):
+        assert (_fields(sqlite_library.search_titles(term))
+                == _fields(library.search_titles(term)))
+    for tag in ("#cat", "#a", "#blah"):
+        assert (_fields(sqlite_library.search_tags(tag))
+                == _fields(library.search_tags(tag)))
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_sqlite_player_output_is_identical(sqlite_library, capfd):
+    def run(player):
+        player.flag_video("amazing_cats_video_id", "dont_like_cats")
+        player.show_all_videos()
+        player.search_videos("cat")
+        player.search_videos_tag("#animal")
+        player.allow_video("amazing_cats_video_id")
+        player.play_video("amazing_cats_video_id")
+        return capfd.readouterr()[0]
+
+    assert run(VideoPlayer(sqlite_library)) == run(VideoPlayer())
+
+
+def test_sqlite_library_reuses_and_reloads_database(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    database = tmp_path / "catalog.db"
+    catalog.write_text("First | first_id | #one\nSecond | second_id |\n")
+    SqliteVideoLibrary(database, catalog).close()
+
+    catalog.write_text("Second | second_id | #two\nThird | third_id |\n")
+    stat = os.stat(catalog)
+    os.utime(catalog, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    library = SqliteVideoLibrary(database, catalog)
+    delta = library.reload()
+    assert delta == ([], [], [])
+    assert [v.video_id for v in library.get_all_videos()] == [
+        "second_id", "third_id"]
+    assert library.get_video("second_id").tags == ("#two",)
+    library.close()
+
+
+def test_sqlite_library_counts_in_sql(sqlite_library):
+    sqlite_library.set_flag("amazing_cats_video_id", [True, "dont_like_cats"])
+
+    assert sqlite_library.count() == 5
+    assert sqlite_library.count_flagged() == 1
+    assert len(sqlite_library.view_all_videos()) == 5
+
+
+def test_sqlite_library_rejects_empty_batches(tmp_path):
+    with pytest.raises(ValueError, match="batch_size"):
+        SqliteVideoLibrary(tmp_path / "catalog.db", batch_size=0)
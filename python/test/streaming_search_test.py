@@ -0,0 +1,52 @@
+from unittest import mock
+
+import pytest
+
+from src.sqlite_library import SqliteVideoLibrary
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _ids(videos):
+    return [video.video_id for video in videos]
+
+
+@pytest.mark.parametrize("term", ["", "cat", "O", "zz", "video"])
+def test_iter_search_matches_search(term, tmp_path):
+    for library in (VideoLibrary(),
+                    SqliteVideoLibrary(tmp_path / "catalog.db")):
+        assert (_ids(library.iter_search_titles(term))
+                == _ids(library.search_titles(term)))
+        assert (_ids(library.iter_search_tags("#" + term))
+                == _ids(library.search_tags("#" + term)))
+
+
+def test_iter_search_is_lazy():
+    library = VideoLibrary()
+    seen = []
+
+    def by_title():
+        for video in VideoLibrary.iter_videos_by_title(library):
+            seen.append(video.title)
+            yield video
+
+    library.iter_videos_by_title = by_title
+    results = library.iter_search_titles("cat")
+    assert next(results).title == "Amazing Cats"
+    assert seen == ["Amazing Cats"]
+
+
+@mock.patch('builtins.input', lambda *args: 'No')
+def test_streamed_output_matches_buffered_output(capfd):
+    outputs = []
+    for stream_results in (False, True):
+        player = VideoPlayer(stream_results=stream_results)
+        player.flag_video("amazing_cats_video_id", "dont_like_cats")
+        player.search_videos("cat")
+        player.search_videos("zz")
+        player.search_videos_tag("#animal")
+        player.flag_video("another_cat_video_id")
+        player.search_videos("cat")
+        outputs.append(capfd.readouterr().out)
+    assert outputs[0] == outputs[1]
+    assert "1) Another Cat Video (another_cat_video_id)" in outputs[1]
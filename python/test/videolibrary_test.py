@@ -1,3 +1,11 @@
+import os
+import struct
+
+import pytest
+
+from src import catalog_snapshot
+from src.catalog_snapshot import SnapshotException
+from src.video_library import DuplicateVideoException
 from src.video_library import VideoLibrary
 
 
@@ -24,3 +32,179 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_loads_custom_catalog_path(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text(
+        "First | first_id | #one , #two\n"
+        "\n"
+        "Second | second_id |\n")
+    library = VideoLibrary(catalog)
+
+    assert len(library.get_all_videos()) == 2
+    assert library.get_video("first_id").tags == ("#one", "#two")
+    assert library.get_video("second_id").tags == ()
+
+
+def test_reports_progress_per_batch(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("".join(
+        "Video {0} | video_{0} | #tag\n".format(i) for i in range(5)))
+    progress = []
+    library = VideoLibrary(catalog, batch_size=2, progress=progress.append)
+
+    assert len(library.get_all_videos()) == 5
+    assert progress == [2, 4, 5]
+
+
+def test_snapshot_round_trip(tmp_path):
+    library = VideoLibrary()
+    snapshot = tmp_path / "catalog.snap"
+    library.save_snapshot(snapshot)
+    restored = VideoLibrary.from_snapshot(snapshot)
+
+    assert ([(v.title, v.video_id, v.tags) for v in restored.get_all_videos()]
+            == [(v.title, v.video_id, v.tags) for v in library.get_all_videos()])
+
+
+def test_snapshot_keeps_title_order_and_defers_engines(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text(
+        "Same | b_id | #two\n"
+        "Alpha | c_id | #one\n"
+        "Same | a_id | #one , #two\n")
+    library = VideoLibrary(catalog)
+    snapshot = tmp_path / "catalog.snap"
+    library.save_snapshot(snapshot)
+    restored = VideoLibrary.from_snapshot(snapshot, catalog)
+
+    assert restored._title_engine is None
+    assert ([v.video_id for v in restored.iter_videos_by_title()]
+            == ["c_id", "b_id", "a_id"])
+    assert ([v.video_id for v in restored.search_titles("same")]
+            == ["b_id", "a_id"])
+    assert ([v.video_id for v in restored.search_tags("#one")]
+            == ["c_id", "a_id"])
+    assert restored._title_engine is not None
+
+
+def test_snapshot_is_little_endian(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("First | first_id | #one\n")
+    snapshot = tmp_path / "catalog.snap"
+    VideoLibrary(catalog).save_snapshot(snapshot)
+    data = snapshot.read_bytes()
+
+    # The string offsets follow the header: 0, then the end of "First".
+    start = catalog_snapshot.HEADER.size
+    assert data[start:start + 8] == struct.pack("<II", 0, 6)
+
+
+def test_snapshot_of_touched_catalog_stays_current(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("First | first_id | #one\n")
+    snapshot = tmp_path / "catalog.snap"
+    VideoLibrary(catalog).save_snapshot(snapshot)
+    stat = os.stat(catalog)
+    os.utime(catalog, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    restored = VideoLibrary.from_snapshot(snapshot, catalog)
+
+    assert restored.source_fingerprint == catalog_snapshot.source_fingerprint(
+        catalog)
+    restored.save_snapshot(snapshot)
+    assert VideoLibrary.from_snapshot(snapshot, catalog).count() == 1
+
+
+def test_snapshot_rejects_stale_catalog(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("First | first_id | #one\n")
+    snapshot = tmp_path / "catalog.snap"
+    VideoLibrary(catalog).save_snapshot(snapshot)
+
+    catalog.write_text("First | first_id | #one\nSecond | second_id |\n")
+    with pytest.raises(SnapshotException):
+        VideoLibrary.from_snapshot(snapshot, catalog)
+
+
+def test_parallel_load_matches_sequential_load(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("".join(
+        "Video {0} | video_{0} | #tag{1} , #all\n".format(i, i % 7)
+        for i in range(1000)))
+    sequential = VideoLibrary(catalog)
+    parallel = VideoLibrary(catalog, workers=4)
+
+    assert ([(v.title, v.video_id, v.tags) for v in parallel.get_all_videos()]
+            == [(v.title, v.video_id, v.tags)
+                for v in sequential.get_all_videos()])
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_duplicate_video_ids(tmp_path, workers):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text(
+        "First | dup_id | #one\n"
+        "Other | other_id |\n"
+        "Second | dup_id | #two\n")
+
+    last = VideoLibrary(catalog, workers=workers)
+    assert [v.title for v in last.get_all_videos()] == ["Second", "Other"]
+
+    first = VideoLibrary(catalog, workers=workers, on_duplicate="first")
+    assert [v.title for v in first.get_all_videos()] == ["First", "Other"]
+
+    with pytest.raises(DuplicateVideoException):
+        VideoLibrary(catalog, workers=workers, on_duplicate="error")
+
+
+def test_tags_are_shared_between_videos():
+    library = VideoLibrary()
+    cats = library.get_video("amazing_cats_video_id")
+    other_cats = library.get_video("another_cat_video_id")
+
+    assert cats.tags is other_cats.tags
+    assert cats.tags == ("#cat", "#animal")
+    assert [video.video_id for video in library.search_tags("#CAT")] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+
+
+def test_flag_state_is_shared_by_library_videos():
+    library = VideoLibrary()
+    library.set_flag("amazing_cats_video_id", [True, "dont_like_cats"])
+
+    assert library.get_video("amazing_cats_video_id").flagged == [
+        True, "dont_like_cats"]
+    assert library.get_video("another_cat_video_id").flagged == [False, ""]
+
+    library.set_flag("amazing_cats_video_id", [False, ""])
+    assert library.get_video("amazing_cats_video_id").flagged == [False, ""]
+
+
+def test_views_do_not_copy_the_catalog():
+    library = VideoLibrary()
+    view = library.view_all_videos()
+
+    assert library.count() == len(view) == 5
+    assert [video.video_id for video in library.iter_videos()] == [
+        video.video_id for video in view]
+    library.set_flag("amazing_cats_video_id", [True, "dont_like_cats"])
+    assert library.count_flagged() == 1
+
+
+def test_search_tags_returns_each_video_once():
+    library = VideoLibrary()
+
+    assert [video.video_id for video in library.search_tags("A")] == [
+        "amazing_cats_video_id", "another_cat_video_id", "funny_dogs_video_id",
+        "life_at_google_video_id"]
+
+
+@pytest.mark.parametrize("engine", ["trigram", "suffix_array", "scan",
+                                    "columnar"])
+def test_title_search_engines_agree(engine):
+    library = VideoLibrary(title_search=engine)
+
+    assert [video.video_id for video in library.search_titles("CAT")] == [
+        "amazing_cats_video_id", "another_cat_video_id"]
+    assert len(library.search_titles("o")) == 4